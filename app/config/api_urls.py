@@ -1,34 +1,75 @@
 """
 TWSE 資料下載工具 - API 網址設定
 """
-from typing import Dict, Any
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Formatter
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Mapping, Optional, Tuple
 
 # =========================
 # 報表類型與 API 設定
 # =========================
-REPORT_TYPES: Dict[str, Dict[str, str]] = {
-    "balance_sheet": {
-        "ajax": "https://mopsov.twse.com.tw/mops/web/ajax_t163sb05?year={year}&TYPEK={market}&season={season}&firstin=1",
-        "download_base": "https://mopsov.twse.com.tw/server-java/t105sb02"
-    },
-    "dividend": {
-        "ajax": "https://mopsov.twse.com.tw/server-java/t05st09sub?YEAR={year}&qryType=2&TYPEK={market}&step=1",
-        "download_base": "https://mopsov.twse.com.tw/server-java/t105sb02"
-    },
-    "income_statement": {
-        "ajax": "https://mopsov.twse.com.tw/mops/web/ajax_t163sb04?year={year}&TYPEK={market}&season={season}&firstin=1",
-        "download_base": "https://mopsov.twse.com.tw/server-java/t105sb02"
-    },
-    "cash_flow": {
-        "ajax": "https://mopsov.twse.com.tw/mops/web/ajax_t163sb20?year={year}&TYPEK={market}&season={season}&firstin=1",
-        "download_base": "https://mopsov.twse.com.tw/server-java/t105sb02"
-    },
-    "etf_dividend": {
-        "url": "https://www.twse.com.tw/rwd/zh/ETF/etfDiv?stkNo=&startDate={start_date}&endDate={end_date}&response=json",
-        "csv_export": "https://www.twse.com.tw/rwd/zh/ETF/etfDiv?stkNo=&startDate={start_date}&endDate={end_date}&response=csv"
-    }
+@dataclass(frozen=True, slots=True)
+class ReportEndpoints:
+    """單一報表類型的 API 端點 (未使用的端點為 None)"""
+    ajax: Optional[str] = None
+    download_base: Optional[str] = None
+    url: Optional[str] = None
+    csv_export: Optional[str] = None
+
+
+# 以唯讀映射包裝，避免執行期修改造成 URL 快取與設定不一致
+REPORT_TYPES: Mapping[str, ReportEndpoints] = MappingProxyType({
+    "balance_sheet": ReportEndpoints(
+        ajax="https://mopsov.twse.com.tw/mops/web/ajax_t163sb05?year={year}&TYPEK={market}&season={season}&firstin=1",
+        download_base="https://mopsov.twse.com.tw/server-java/t105sb02"
+    ),
+    "dividend": ReportEndpoints(
+        ajax="https://mopsov.twse.com.tw/server-java/t05st09sub?YEAR={year}&qryType=2&TYPEK={market}&step=1",
+        download_base="https://mopsov.twse.com.tw/server-java/t105sb02"
+    ),
+    "income_statement": ReportEndpoints(
+        ajax="https://mopsov.twse.com.tw/mops/web/ajax_t163sb04?year={year}&TYPEK={market}&season={season}&firstin=1",
+        download_base="https://mopsov.twse.com.tw/server-java/t105sb02"
+    ),
+    "cash_flow": ReportEndpoints(
+        ajax="https://mopsov.twse.com.tw/mops/web/ajax_t163sb20?year={year}&TYPEK={market}&season={season}&firstin=1",
+        download_base="https://mopsov.twse.com.tw/server-java/t105sb02"
+    ),
+    "etf_dividend": ReportEndpoints(
+        url="https://www.twse.com.tw/rwd/zh/ETF/etfDiv?stkNo=&startDate={start_date}&endDate={end_date}&response=json",
+        csv_export="https://www.twse.com.tw/rwd/zh/ETF/etfDiv?stkNo=&startDate={start_date}&endDate={end_date}&response=csv"
+    )
+})
+
+# =========================
+# URL 產生函式 (搭配 lru_cache，同一組參數只格式化一次)
+# =========================
+# 格式化函式直接取自 REPORT_TYPES 的樣板，確保網址只有單一來源
+_AJAX_FORMATTERS: Dict[str, Callable[..., str]] = {
+    report_type: endpoints.ajax.format
+    for report_type, endpoints in REPORT_TYPES.items()
+    if endpoints.ajax is not None
+}
+
+# 各報表 AJAX URL 所需參數 (由樣板中的欄位名稱取得)
+_AJAX_REQUIRED_PARAMS: Dict[str, Tuple[str, ...]] = {
+    report_type: tuple(field for _, field, _, _ in Formatter().parse(endpoints.ajax) if field)
+    for report_type, endpoints in REPORT_TYPES.items()
+    if endpoints.ajax is not None
 }
 
+_DOWNLOAD_FORMATTERS: Dict[str, Callable[[str], str]] = {
+    report_type: (lambda filename, base=endpoints.download_base: f"{base}?firstin=true&step=10&filename={filename}")
+    for report_type, endpoints in REPORT_TYPES.items()
+    if endpoints.download_base is not None
+}
+
+_etf_csv_url: Callable[..., str] = REPORT_TYPES["etf_dividend"].csv_export.format
+_etf_json_url: Callable[..., str] = REPORT_TYPES["etf_dividend"].url.format
+
+@lru_cache(maxsize=1024)
 def get_ajax_url(report_type: str, year: str, market: str, season: str = None) -> str:
     """
     取得指定報表的 AJAX URL
@@ -46,21 +87,19 @@ def get_ajax_url(report_type: str, year: str, market: str, season: str = None) -
         KeyError: 不支援的報表類型
         ValueError: 缺少必要參數
     """
-    if report_type not in REPORT_TYPES:
+    try:
+        formatter = _AJAX_FORMATTERS[report_type]
+    except KeyError:
+        if report_type in REPORT_TYPES and REPORT_TYPES[report_type].ajax is None:
+            raise ValueError(f"報表類型 {report_type} 沒有 ajax 設定")
         raise KeyError(f"不支援的報表類型: {report_type}")
     
-    config = REPORT_TYPES[report_type]
+    if season is None and "season" in _AJAX_REQUIRED_PARAMS[report_type]:
+        raise ValueError(f"報表類型 {report_type} 需要提供 season 參數")
     
-    if "ajax" not in config:
-        raise ValueError(f"報表類型 {report_type} 沒有 ajax 設定")
-    
-    if report_type == "dividend":
-        return config["ajax"].format(year=year, market=market)
-    else:
-        if season is None:
-            raise ValueError(f"報表類型 {report_type} 需要提供 season 參數")
-        return config["ajax"].format(year=year, market=market, season=season)
+    return formatter(year=year, market=market, season=season)
 
+@lru_cache(maxsize=1024)
 def get_download_url(report_type: str, filename: str) -> str:
     """
     取得檔案下載 URL
@@ -75,17 +114,15 @@ def get_download_url(report_type: str, filename: str) -> str:
     Raises:
         KeyError: 不支援的報表類型
     """
-    if report_type not in REPORT_TYPES:
+    try:
+        return _DOWNLOAD_FORMATTERS[report_type](filename)
+    except KeyError:
+        if report_type in REPORT_TYPES and REPORT_TYPES[report_type].download_base is None:
+            raise ValueError(f"報表類型 {report_type} 沒有 download_base 設定")
         raise KeyError(f"不支援的報表類型: {report_type}")
-    
-    config = REPORT_TYPES[report_type]
-    
-    if "download_base" not in config:
-        raise ValueError(f"報表類型 {report_type} 沒有 download_base 設定")
-    
-    return f"{config['download_base']}?firstin=true&step=10&filename={filename}"
 
-def get_etf_urls(start_date: str, end_date: str) -> Dict[str, str]:
+@lru_cache(maxsize=64)
+def get_etf_urls(start_date: str, end_date: str) -> Mapping[str, str]:
     """
     取得 ETF 股利資料的 URL
     
@@ -94,43 +131,45 @@ def get_etf_urls(start_date: str, end_date: str) -> Dict[str, str]:
         end_date: 結束日期 (格式: YYYYMMDD)
         
     Returns:
-        包含 CSV 和 JSON URL 的字典
+        包含 CSV 和 JSON URL 的唯讀字典 (結果會被快取，不可修改)
     """
-    config = REPORT_TYPES["etf_dividend"]
-    return {
-        "csv": config["csv_export"].format(start_date=start_date, end_date=end_date),
-        "json": config["url"].format(start_date=start_date, end_date=end_date)
-    }
+    return MappingProxyType({
+        "csv": _etf_csv_url(start_date=start_date, end_date=end_date),
+        "json": _etf_json_url(start_date=start_date, end_date=end_date)
+    })
 
 # =========================
 # 股價資料 API 設定
 # =========================
-STOCK_PRICE_APIS = {
-    "twse": {
+# 以唯讀映射包裝，確保快取的網址與設定一致
+STOCK_PRICE_APIS: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "twse": MappingProxyType({
         "url": "https://openapi.twse.com.tw/v1/exchangeReport/STOCK_DAY_AVG_ALL",
         "market": "TSE",
         "description": "上市股票日平均價格"
-    },
-    "tpex": {
+    }),
+    "tpex": MappingProxyType({
         "url": "https://www.tpex.org.tw/openapi/v1/tpex_mainboard_quotes",
         "market": "OTC",
         "description": "上櫃股票即時報價"
-    }
-}
+    })
+})
 
 def get_stock_price_urls():
     """
     取得股價 API 網址清單
     
     Returns:
-        包含所有股價 API 資訊的字典
+        包含所有股價 API 資訊的唯讀字典
     """
     return STOCK_PRICE_APIS
 
+@lru_cache(maxsize=None)
 def get_twse_stock_url():
     """取得上市股票 API 網址"""
     return STOCK_PRICE_APIS["twse"]["url"]
 
+@lru_cache(maxsize=None)
 def get_tpex_stock_url():
     """取得上櫃股票 API 網址"""
     return STOCK_PRICE_APIS["tpex"]["url"]
\ No newline at end of file
@@ -237,6 +237,17 @@ TEXT_COLUMNS: Dict[str, List[str]] = {
     'yingzaibiao_jp': ["Symbol","收盤日"]  # 日股 Symbol 也必須以文字格式儲存
 }
 
+# =========================
+# 低基數欄位設定（重複值多的文字欄位，儲存前轉為 category 以節省記憶體）
+# =========================
+LOW_CARDINALITY_COLUMNS: Dict[str, List[str]] = {
+    'balance_sheet': ['年度', '季別'],
+    'income_statement': ['年度', '季別', '出表日期'],
+    'cash_flow': ['年度', '季別'],
+    'dividend': ['年度', '季別', '股利所屬期間', '決議（擬議）進度'],
+    'etf_dividend': ['年度', '季別'],
+}
+
 # =========================
 # 欄位重新命名對應
 # =========================
@@ -337,6 +348,18 @@ def get_text_columns(report_type: str) -> List[str]:
     """
     return TEXT_COLUMNS.get(report_type, []).copy()
 
+def get_low_cardinality_columns(report_type: str) -> List[str]:
+    """
+    取得指定報表類型的低基數欄位清單
+    
+    Args:
+        report_type: 報表類型
+        
+    Returns:
+        低基數欄位名稱清單
+    """
+    return LOW_CARDINALITY_COLUMNS.get(report_type, []).copy()
+
 def get_rename_mapping(report_type: str) -> Dict[str, str]:
     """
     取得指定報表類型的欄位重新命名對應
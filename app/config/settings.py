@@ -2,23 +2,25 @@
 TWSE 資料下載工具 - 基本設定
 """
 
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
 import os
 from utils.date_utils import get_current_roc_year
 
 # =========================
 # 基本處理參數
 # =========================
-START_YEAR: int = get_current_roc_year()
-END_YEAR: int = get_current_roc_year()
-MARKETS: List[str] = ["sii", "otc"]
-SEASONS: List[str] = ["01", "02", "03", "04"]
+_CURRENT_ROC_YEAR: int = get_current_roc_year()  # 只計算一次，確保起訖年度一致
+START_YEAR: int = _CURRENT_ROC_YEAR
+END_YEAR: int = _CURRENT_ROC_YEAR
+MARKETS: Tuple[str, ...] = ("sii", "otc")
+SEASONS: Tuple[str, ...] = ("01", "02", "03", "04")
 
 # =========================
 # 處理選項
 # =========================
 DOWNLOAD_REPORTS: List[str] = ['all']  # 處理所有報表類型
-SAVE_FORMAT: List[str] = ['csv', 'json']  # 可為 ['csv'], ['json'], ['csv', 'json']
+SAVE_FORMAT: List[str] = ['csv', 'json']  # 可為 'csv'、'json'、'parquet' 的任意組合 (parquet 需安裝 pyarrow)
+PRETTY_JSON: bool = False  # 合併資料 JSON 是否縮排輸出 (關閉時輸出緊湊格式，檔案約小一半)
 ENABLE_DOWNLOAD_REPORTS: bool = False # 是否下載報表資料
 ENABLE_MERGE_REPORTS: bool = False # 是否合併報表資料
 ENABLE_PRECOMPUTE_METRICS: bool = False # 是否預計算長表
@@ -37,6 +39,7 @@ RAW_DATA_DIR: str = "datas/raw_data"
 MERGED_DATA_DIR: str = "datas/merged_data"
 MERGED_CSV_DIR: str = os.path.join(MERGED_DATA_DIR, "csv")
 MERGED_JSON_DIR: str = os.path.join(MERGED_DATA_DIR, "json")
+MERGED_PARQUET_DIR: str = os.path.join(MERGED_DATA_DIR, "parquet")  # SAVE_FORMAT 含 parquet 時使用
 MERGED_LOG_DIR: str = os.path.join(LOG_DIR_BASE, "log.json")
 
 # =========================
@@ -86,6 +89,12 @@ HEADERS: Dict[str, str] = {
 REQUEST_TIMEOUT: int = 30
 RETRY_ATTEMPTS: int = 3
 RETRY_DELAY: float = 2.0
+MAX_CONCURRENT_DOWNLOADS: int = 8  # 批次下載同時進行的請求數
+YEAR_CONCURRENCY: int = 4  # 同一報表同時處理的年度數
+HTTP_CACHE_FILE: str = os.path.join(LOG_DIR_BASE, "http_cache.json")  # ETag / Last-Modified 索引
+RATE_LIMITS: Dict[str, float] = {  # 各主機每秒請求數上限 (未列出者不限速)
+    "mopsov.twse.com.tw": 4.0,
+}
 
 # =========================
 # 股價相關設定
@@ -107,12 +116,25 @@ YINGZAIBIAO_COOKIES_PATH: str = os.path.join(YINGZAIBIAO_RAW_DIR, ".cookies")  #
 YINGZAIBIAO_EXCEL_PATH: str = os.path.join(YINGZAIBIAO_RAW_DIR, "twlist.xlsx")  # Excel 檔案路徑
 YINGZAIBIAO_CSV_PATH: str = os.path.join(MERGED_CSV_DIR, "latest_yingzaibiao.csv")  # CSV 輸出路徑
 YINGZAIBIAO_JSON_PATH: str = os.path.join(MERGED_JSON_DIR, "latest_yingzaibiao.json")  # JSON 輸出路徑
+YINGZAIBIAO_POPUP_WAIT: int = int(os.getenv("YINGZAIBIAO_POPUP_WAIT", "0"))  # 等待手動關閉 Chrome 密碼彈窗的秒數 (0 為不等待)
+
+# =========================
+# 瀏覽器 (Selenium) 相關設定
+# =========================
+_CACHE_HOME: str = os.path.join(os.path.expanduser("~"), ".cache")
+CHROME_PROFILE_DIR: str = os.path.join(_CACHE_HOME, "stock_screener", "chrome_profile")  # 本地執行沿用的 Chrome 設定檔 (CI 不使用)
+SELENIUM_CACHE_DIR: str = os.path.join(_CACHE_HOME, "selenium")  # Selenium Manager 驅動程式快取目錄
 
 # =========================
 # 自動建立必要目錄
 # =========================
+_ENSURED_DIRECTORIES: Set[str] = set()  # 本次執行已建立過的目錄
+
 def ensure_directories() -> None:
-    """確保所有必要的目錄存在"""
+    """確保所有必要的目錄存在 (每個目錄每次執行只建立一次)"""
     directories = [MERGED_DATA_DIR, MERGED_CSV_DIR, MERGED_JSON_DIR, RAW_DATA_DIR]
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
\ No newline at end of file
+        if directory in _ENSURED_DIRECTORIES:
+            continue
+        os.makedirs(directory, exist_ok=True)
+        _ENSURED_DIRECTORIES.add(directory)
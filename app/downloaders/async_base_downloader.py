@@ -0,0 +1,243 @@
+"""
+TWSE 資料下載工具 - 非同步基礎下載器
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+from .base_downloader import (
+    BaseDownloader, DownloadTask, get_rate_limiter, _make_transcoder, NOT_MODIFIED, STREAM_CHUNK_SIZE, WRITE_BUFFER_SIZE
+)
+from config.settings import (
+    HEADERS, REQUEST_TIMEOUT, RETRY_ATTEMPTS, RETRY_DELAY, MAX_CONCURRENT_DOWNLOADS
+)
+
+
+class AsyncBaseDownloader(BaseDownloader):
+    """非同步基礎下載器 - 以 httpx (HTTP/2) 共用連線進行批次下載"""
+
+    def _create_async_client(self, concurrency: int = MAX_CONCURRENT_DOWNLOADS) -> "httpx.AsyncClient":
+        """建立支援 HTTP/2 與連線池的非同步 client"""
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency
+            ),
+            timeout=REQUEST_TIMEOUT,
+            headers=HEADERS,
+            verify=False
+        )
+
+    async def make_request_async(
+        self,
+        client: "httpx.AsyncClient",
+        url: str,
+        method: str = "GET",
+        **kwargs
+    ) -> Optional["httpx.Response"]:
+        """
+        發送非同步 HTTP 請求 (含重試機制，回應以串流方式開啟)
+
+        Args:
+            client: 非同步 HTTP client
+            url: 請求網址
+            method: HTTP 方法
+            **kwargs: 額外參數
+
+        Returns:
+            尚未讀取內容的串流回應物件 (呼叫端需負責關閉)，
+            條件式請求收到 304 時回傳 NOT_MODIFIED，失敗時回傳 None
+        """
+        limiter = get_rate_limiter(url)
+
+        for attempt in range(RETRY_ATTEMPTS):
+            if limiter is not None:
+                wait = limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            try:
+                request = client.build_request(method, url, **kwargs)
+                response = await client.send(request, stream=True)
+
+                if response.status_code == 200:
+                    return response
+
+                await response.aclose()
+                if response.status_code == 304:
+                    return NOT_MODIFIED
+
+                self.logger.warning(
+                    f"請求失敗 (嘗試 {attempt + 1}/{RETRY_ATTEMPTS}): "
+                    f"HTTP {response.status_code}"
+                )
+
+            except Exception as e:
+                self.logger.warning(
+                    f"請求失敗 (嘗試 {attempt + 1}/{RETRY_ATTEMPTS}): {e}"
+                )
+
+            if attempt < RETRY_ATTEMPTS - 1:
+                await asyncio.sleep(RETRY_DELAY)
+
+        self.logger.error(f"請求最終失敗: {url}")
+        return None
+
+    async def download_file_with_retry_async(
+        self,
+        client: "httpx.AsyncClient",
+        url: str,
+        file_path: str,
+        encoding: str = "utf-8-sig"
+    ) -> bool:
+        """
+        非同步下載檔案 (含重試機制)
+
+        Args:
+            client: 非同步 HTTP client
+            url: 下載網址
+            file_path: 儲存路徑
+            encoding: 編碼格式
+
+        Returns:
+            是否成功下載
+        """
+        response = await self.make_request_async(
+            client, url, headers=self._get_conditional_headers(file_path)
+        )
+
+        if response is None:
+            return False
+
+        if response is NOT_MODIFIED:
+            self.logger.debug(f"檔案未變更，沿用本地檔案: {file_path}")
+            return True
+
+        headers = response.headers
+        if not await self.save_response_to_file_async(response, file_path, encoding):
+            return False
+
+        self._update_http_cache(file_path, headers)
+        return True
+
+    async def save_response_to_file_async(
+        self,
+        response: "httpx.Response",
+        file_path: str,
+        encoding: str = "utf-8-sig"
+    ) -> bool:
+        """
+        將串流回應內容逐塊儲存到檔案
+
+        Args:
+            response: 串流模式的 HTTP 回應
+            file_path: 檔案路徑
+            encoding: 編碼格式
+
+        Returns:
+            是否成功儲存
+        """
+        tmp_path = f"{file_path}.tmp"
+        try:
+            convert, finish = _make_transcoder(encoding)
+
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                async for chunk in response.aiter_bytes(chunk_size=STREAM_CHUNK_SIZE):
+                    f.write(convert(chunk))
+                f.write(finish())
+
+            os.replace(tmp_path, file_path)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"儲存檔案失敗 {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        finally:
+            await response.aclose()
+
+    async def batch_download_async(
+        self,
+        download_tasks: Sequence[DownloadTask],
+        description: str = "下載中",
+        concurrency: Optional[int] = None
+    ) -> int:
+        """
+        非同步批次下載檔案
+
+        Args:
+            download_tasks: 下載任務清單
+            description: 進度描述
+            concurrency: 同時下載數 (預設為 MAX_CONCURRENT_DOWNLOADS)
+
+        Returns:
+            成功下載的檔案數量
+        """
+        total = len(download_tasks)
+        self.logger.info(f"開始 {description}，共 {total} 個檔案")
+
+        concurrency = concurrency or MAX_CONCURRENT_DOWNLOADS
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with self._create_async_client(concurrency) as client:
+            async def _download(task: DownloadTask) -> bool:
+                async with semaphore:
+                    ok = await self.download_file_with_retry_async(
+                        client, task.url, task.path, task.encoding
+                    )
+                if not ok:
+                    self.logger.warning(f"下載失敗: {task.path}")
+                return ok
+
+            results = await asyncio.gather(*(_download(task) for task in download_tasks))
+
+        self.flush_http_cache()
+        success_count = sum(results)
+        self.logger.info(f"{description} 完成: {success_count}/{total} 成功")
+        return success_count
+
+    def batch_download(
+        self,
+        download_tasks: Sequence[DownloadTask],
+        description: str = "下載中",
+        concurrency: Optional[int] = None
+    ) -> int:
+        """
+        批次下載檔案 (同步介面，未安裝 httpx 時退回執行緒池版本)
+
+        Args:
+            download_tasks: 下載任務清單
+            description: 進度描述
+            concurrency: 同時下載數 (預設為 MAX_CONCURRENT_DOWNLOADS)
+
+        Returns:
+            成功下載的檔案數量
+        """
+        if not HAS_HTTPX:
+            return super().batch_download(download_tasks, description, concurrency)
+
+        coro = self.batch_download_async(download_tasks, description, concurrency)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+
+        # 已在事件迴圈中 (例如由 main.py 的 async 流程呼叫)，改在獨立執行緒執行
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
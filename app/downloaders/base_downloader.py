@@ -1,18 +1,147 @@
 """
 TWSE 資料下載工具 - 基礎下載器
 """
+import codecs
+import json
+import os
 import requests
+import threading
 import time
 import urllib3
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from utils.logger import Logger
-from config.settings import HEADERS, REQUEST_TIMEOUT, RETRY_ATTEMPTS, RETRY_DELAY
+from config.settings import (
+    HEADERS, REQUEST_TIMEOUT, RETRY_ATTEMPTS, RETRY_DELAY, MAX_CONCURRENT_DOWNLOADS,
+    HTTP_CACHE_FILE, RATE_LIMITS
+)
+
+# 串流寫檔的區塊大小
+STREAM_CHUNK_SIZE = 64 * 1024
+# 寫檔緩衝區大小
+WRITE_BUFFER_SIZE = 1024 * 1024
+# 需要重試的 HTTP 狀態碼 (429 會依 Retry-After 標頭退避)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# tqdm 延遲載入 (None 表示尚未嘗試載入，False 表示未安裝)
+_tqdm = None
+
+
+def _get_tqdm():
+    """取得 tqdm 類別，未安裝時回傳 None"""
+    global _tqdm
+    if _tqdm is None:
+        try:
+            from tqdm import tqdm
+            _tqdm = tqdm
+        except ImportError:
+            _tqdm = False
+    return _tqdm or None
+
+
+class _RateLimiter:
+    """Token bucket 限速器 - 限制對單一主機的每秒請求數"""
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """預約一個 token，回傳需要等待的秒數"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+    
+    def acquire(self) -> None:
+        """取得 token (必要時阻塞等待)"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+_rate_limiters: Dict[str, _RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(url: str) -> Optional[_RateLimiter]:
+    """取得網址所屬主機的限速器，未設定限速時回傳 None"""
+    host = urlparse(url).netloc
+    rate = RATE_LIMITS.get(host)
+    if not rate:
+        return None
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(host)
+        if limiter is None:
+            limiter = _rate_limiters[host] = _RateLimiter(rate)
+        return limiter
+
+# 伺服器回應 304 Not Modified 時 make_request 回傳的標記
+NOT_MODIFIED = object()
+
+# 條件式請求索引 {file_path: {"etag": ..., "last_modified": ...}}，每個程序只載入一次
+_http_cache: Optional[Dict[str, Dict[str, Any]]] = None
+_http_cache_dirty = False
+_http_cache_lock = threading.Lock()
+
+
+def _get_http_cache() -> Dict[str, Dict[str, Any]]:
+    """取得條件式請求索引 (首次呼叫時從檔案載入)"""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            try:
+                with open(HTTP_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _http_cache = json.load(f)
+            except (OSError, ValueError):
+                _http_cache = {}
+        return _http_cache
 
 # 忽略 SSL 證書警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+class DownloadTask(NamedTuple):
+    """單一檔案下載任務"""
+    url: str
+    path: str
+    encoding: str = "utf-8-sig"
+
+
+def _make_transcoder(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """
+    建立逐塊轉碼函式，輸出一律為 utf-8-sig 位元組
+    
+    Args:
+        encoding: 來源編碼 (big5 需轉碼，其餘視為 utf-8)
+        
+    Returns:
+        (轉換單一區塊的函式, 取得結尾剩餘位元組的函式)
+    """
+    # 以增量解碼/編碼逐塊處理；無法解碼的位元組以替代字元取代 (同 response.text)，
+    # utf-8 來源以 utf-8-sig 解碼，原有的 BOM 會被移除後由編碼器統一補上
+    source = "big5" if encoding == "big5" else "utf-8-sig"
+    decoder = codecs.getincrementaldecoder(source)(errors="replace")
+    encoder = codecs.getincrementalencoder("utf-8-sig")()
+    
+    def convert(chunk: bytes) -> bytes:
+        return encoder.encode(decoder.decode(chunk))
+    
+    def finish() -> bytes:
+        return encoder.encode(decoder.decode(b"", final=True), final=True)
+    
+    return convert, finish
+
+
 class BaseDownloader(ABC):
     """基礎下載器抽象類"""
     
@@ -24,13 +153,73 @@ class BaseDownloader(ABC):
             logger: 日誌記錄器
         """
         self.logger = logger
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+        # requests.Session 非執行緒安全，每個執行緒各自持有一個
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+        # 長駐執行緒池：工作執行緒不隨每次批次結束，其 Session 與連線可重複使用
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.session = self._get_session()
+    
+    def close(self) -> None:
+        """關閉執行緒池與所有執行緒的 Session 及其保留的連線"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
     
     def __del__(self):
         """清理資源"""
-        if hasattr(self, 'session'):
-            self.session.close()
+        if hasattr(self, '_sessions_lock'):
+            self.close()
+    
+    def _create_session(self) -> requests.Session:
+        """建立新的 HTTP Session"""
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.verify = False
+        
+        # 由 urllib3 處理重試與連線池，RETRY_ATTEMPTS 為總嘗試次數
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=RETRY_ATTEMPTS - 1,
+                backoff_factor=RETRY_DELAY / 2,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset(["GET", "POST"])
+            )
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def _get_session(self) -> requests.Session:
+        """取得目前執行緒專用的 Session"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._create_session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """取得此下載器共用的執行緒池 (最多 MAX_CONCURRENT_DOWNLOADS 個工作執行緒)"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=MAX_CONCURRENT_DOWNLOADS,
+                        thread_name_prefix=type(self).__name__
+                    )
+        return self._executor
     
     @abstractmethod
     def download_data(self, year: str, output_dir: str) -> bool:
@@ -50,6 +239,7 @@ class BaseDownloader(ABC):
         self, 
         url: str, 
         method: str = "GET", 
+        file_path: Optional[str] = None,
         **kwargs
     ) -> Optional[requests.Response]:
         """
@@ -58,37 +248,43 @@ class BaseDownloader(ABC):
         Args:
             url: 請求網址
             method: HTTP 方法
+            file_path: 對應的本地檔案，若已存在則發送條件式請求
             **kwargs: 額外參數
             
         Returns:
-            回應物件，失敗時回傳 None
+            回應物件，檔案未變更時回傳 NOT_MODIFIED，失敗時回傳 None
         """
-        for attempt in range(RETRY_ATTEMPTS):
-            try:
-                response = self.session.request(
-                    method=method,
-                    url=url,
-                    timeout=REQUEST_TIMEOUT,
-                    verify=False,
-                    **kwargs
-                )
-                
-                if response.status_code == 200:
-                    return response
-                else:
-                    self.logger.warning(
-                        f"請求失敗 (嘗試 {attempt + 1}/{RETRY_ATTEMPTS}): "
-                        f"HTTP {response.status_code}"
-                    )
-                    
-            except Exception as e:
-                self.logger.warning(
-                    f"請求失敗 (嘗試 {attempt + 1}/{RETRY_ATTEMPTS}): {e}"
-                )
-            
-            if attempt < RETRY_ATTEMPTS - 1:
-                time.sleep(RETRY_DELAY)
+        if file_path:
+            conditional_headers = self._get_conditional_headers(file_path)
+            if conditional_headers:
+                kwargs["headers"] = {**kwargs.get("headers", {}), **conditional_headers}
+        
+        limiter = get_rate_limiter(url)
+        if limiter is not None:
+            limiter.acquire()
+        
+        try:
+            response = self._get_session().request(
+                method=method,
+                url=url,
+                timeout=REQUEST_TIMEOUT,
+                stream=True,
+                **kwargs
+            )
+        except Exception as e:
+            self.logger.warning(f"請求失敗: {e}")
+            self.logger.error(f"請求最終失敗: {url}")
+            return None
+        
+        if response.status_code == 200:
+            return response
+        
+        if file_path and response.status_code == 304:
+            response.close()
+            return NOT_MODIFIED
         
+        response.close()
+        self.logger.warning(f"請求失敗: HTTP {response.status_code}")
         self.logger.error(f"請求最終失敗: {url}")
         return None
     
@@ -109,34 +305,34 @@ class BaseDownloader(ABC):
         Returns:
             是否成功儲存
         """
+        tmp_path = f"{file_path}.tmp"
         try:
-            # 智能編碼檢測和轉換
-            if encoding == "big5":
-                # 嘗試 big5 解碼，失敗則自動偵測編碼
-                try:
-                    response.encoding = "big5"
-                    content = response.text
-                except (UnicodeDecodeError, UnicodeEncodeError):
-                    # big5 失敗，嘗試 utf-8
-                    try:
-                        response.encoding = "utf-8"
-                        content = response.text
-                    except (UnicodeDecodeError, UnicodeEncodeError):
-                        # 使用原始 bytes 並嘗試 errors='ignore'
-                        content = response.content.decode('big5', errors='ignore')
-            else:
-                response.encoding = "utf-8"
-                content = response.text
+            convert, finish = _make_transcoder(encoding)
             
-            # 儲存時使用 utf-8-sig 以確保相容性
-            with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
-                f.write(content)
+            # 一律儲存為 utf-8-sig 以確保相容性；先寫入暫存檔，完成後再原子替換
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                for chunk in self._iter_response_chunks(response):
+                    f.write(convert(chunk))
+                f.write(finish())
             
+            os.replace(tmp_path, file_path)
             return True
             
         except Exception as e:
             self.logger.error(f"儲存檔案失敗 {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
+        finally:
+            if not getattr(response, "is_closed", False):
+                response.close()
+    
+    @staticmethod
+    def _iter_response_chunks(response):
+        """逐塊讀取回應內容 (相容 requests 與 httpx 回應物件)"""
+        if hasattr(response, "iter_content"):
+            return response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+        return response.iter_bytes(chunk_size=STREAM_CHUNK_SIZE)
     
     def download_file_with_retry(
         self, 
@@ -155,46 +351,124 @@ class BaseDownloader(ABC):
         Returns:
             是否成功下載
         """
-        response = self.make_request(url)
+        response = self.make_request(url, file_path=file_path)
         
         if response is None:
             return False
         
-        return self.save_response_to_file(response, file_path, encoding)
+        if response is NOT_MODIFIED:
+            self.logger.debug(f"檔案未變更，沿用本地檔案: {file_path}")
+            return True
+        
+        headers = response.headers
+        if not self.save_response_to_file(response, file_path, encoding):
+            return False
+        
+        self._update_http_cache(file_path, headers)
+        return True
+    
+    def _get_conditional_headers(self, file_path: str) -> Dict[str, str]:
+        """依索引產生 If-None-Match / If-Modified-Since 標頭"""
+        if not os.path.exists(file_path):
+            return {}
+        
+        entry = _get_http_cache().get(file_path)
+        if not entry:
+            return {}
+        
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def _update_http_cache(self, file_path: str, headers) -> None:
+        """以回應標頭更新條件式請求索引"""
+        global _http_cache_dirty
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        cache = _get_http_cache()
+        
+        with _http_cache_lock:
+            if etag or last_modified:
+                cache[file_path] = {"etag": etag, "last_modified": last_modified}
+                _http_cache_dirty = True
+            elif cache.pop(file_path, None) is not None:
+                _http_cache_dirty = True
+    
+    def flush_http_cache(self) -> None:
+        """將條件式請求索引寫回檔案"""
+        global _http_cache_dirty
+        with _http_cache_lock:
+            if not _http_cache_dirty or _http_cache is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(HTTP_CACHE_FILE), exist_ok=True)
+                with open(HTTP_CACHE_FILE, "w", encoding="utf-8") as f:
+                    json.dump(_http_cache, f, ensure_ascii=False, indent=2)
+                _http_cache_dirty = False
+            except OSError as e:
+                self.logger.warning(f"儲存 HTTP 快取索引失敗: {e}")
     
     def batch_download(
         self, 
-        download_tasks: List[Dict[str, str]], 
-        description: str = "下載中"
+        download_tasks: Sequence[DownloadTask], 
+        description: str = "下載中",
+        concurrency: Optional[int] = None
     ) -> int:
         """
         批次下載檔案
         
         Args:
-            download_tasks: 下載任務清單 [{"url": "...", "path": "...", "encoding": "..."}]
+            download_tasks: 下載任務清單
             description: 進度描述
+            concurrency: 同時下載數 (預設與上限皆為 MAX_CONCURRENT_DOWNLOADS)
             
         Returns:
             成功下載的檔案數量
         """
+        # 指定較小的同時下載數時，以 semaphore 限制共用執行緒池中同時進行的下載
+        limit = threading.Semaphore(concurrency) if concurrency else None
+        
+        def _download(task: DownloadTask) -> bool:
+            if limit is None:
+                return self.download_file_with_retry(task.url, task.path, task.encoding)
+            with limit:
+                return self.download_file_with_retry(task.url, task.path, task.encoding)
+        
         success_count = 0
+        total = len(download_tasks)
         
-        try:
-            from tqdm import tqdm
-            iterator = tqdm(download_tasks, desc=description)
-        except ImportError:
-            iterator = download_tasks
-            self.logger.info(f"開始 {description}，共 {len(download_tasks)} 個檔案")
+        tqdm = _get_tqdm()
+        if tqdm is not None:
+            progress = tqdm(total=total, desc=description)
+        else:
+            progress = None
+            self.logger.info(f"開始 {description}，共 {total} 個檔案")
+        
+        executor = self._get_executor()
+        futures = {executor.submit(_download, task): task.path for task in download_tasks}
         
-        for task in iterator:
-            url = task["url"]
-            file_path = task["path"]
-            encoding = task.get("encoding", "utf-8-sig")
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                self.logger.warning(f"下載發生錯誤 {file_path}: {e}")
+                ok = False
             
-            if self.download_file_with_retry(url, file_path, encoding):
+            if ok:
                 success_count += 1
             else:
                 self.logger.warning(f"下載失敗: {file_path}")
+            
+            if progress is not None:
+                progress.update(1)
+        
+        if progress is not None:
+            progress.close()
         
-        self.logger.info(f"{description} 完成: {success_count}/{len(download_tasks)} 成功")
-        return success_count
\ No newline at end of file
+        self.flush_http_cache()
+        self.logger.info(f"{description} 完成: {success_count}/{total} 成功")
+        return success_count
@@ -1,14 +1,29 @@
 """
 TWSE 資料下載工具 - ETF 股利下載器
 """
+import csv
 import os
-import pandas as pd
-from typing import Dict
+from functools import lru_cache
+from typing import NamedTuple
 
-from .base_downloader import BaseDownloader
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from .base_downloader import BaseDownloader, NOT_MODIFIED
 from config.api_urls import get_etf_urls
 
 
+class DateRange(NamedTuple):
+    """ETF 查詢日期範圍"""
+    start: str
+    end: str
+    ad_year: str
+    roc_year: str
+
+
 class ETFDownloader(BaseDownloader):
     """ETF 股利資料下載器"""
     
@@ -29,20 +44,25 @@ class ETFDownloader(BaseDownloader):
         date_range = self._calculate_date_range(year)
         
         # 2. 取得 API URLs
-        urls = get_etf_urls(date_range["start"], date_range["end"])
+        urls = get_etf_urls(date_range.start, date_range.end)
         
         # 3. 設定檔案路徑
-        csv_filename = f"etf_dividend_{date_range['ad_year']}.csv"
+        csv_filename = f"etf_dividend_{date_range.ad_year}.csv"
         csv_path = os.path.join(output_dir, csv_filename)
         
-        # 4. 優先嘗試 CSV 下載
-        if self._download_csv(urls["csv"], csv_path):
-            return True
-        
-        # 5. CSV 失敗，嘗試 JSON 轉 CSV
-        return self._download_json_as_csv(urls["json"], csv_path)
+        try:
+            # 4. 優先嘗試 CSV 下載
+            if self._download_csv(urls["csv"], csv_path):
+                return True
+            
+            # 5. CSV 失敗，嘗試 JSON 轉 CSV
+            return self._download_json_as_csv(urls["json"], csv_path)
+        finally:
+            self.flush_http_cache()
     
-    def _calculate_date_range(self, roc_year: str) -> Dict[str, str]:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _calculate_date_range(roc_year: str) -> DateRange:
         """
         計算日期範圍
         
@@ -50,17 +70,10 @@ class ETFDownloader(BaseDownloader):
             roc_year: 民國年度
             
         Returns:
-            包含開始日期、結束日期和西元年的字典
+            包含開始日期、結束日期 (下一年的1月1日) 和西元年的 DateRange
         """
-        roc_year_int = int(roc_year)
-        ad_year = roc_year_int + 1911
-        
-        return {
-            "start": f"{ad_year}0101",
-            "end": f"{ad_year + 1}0101",  # 下一年的1月1日
-            "ad_year": str(ad_year),
-            "roc_year": roc_year
-        }
+        ad_year = int(roc_year) + 1911
+        return DateRange(f"{ad_year}0101", f"{ad_year + 1}0101", str(ad_year), roc_year)
     
     def _download_csv(self, csv_url: str, csv_path: str) -> bool:
         """
@@ -75,13 +88,20 @@ class ETFDownloader(BaseDownloader):
         """
         self.logger.debug(f"嘗試 CSV 下載: {csv_url}")
         
-        response = self.make_request(csv_url)
+        # 本地已有檔案時發送條件式請求，未變更則沿用
+        response = self.make_request(csv_url, file_path=csv_path)
         
         if response is None:
             return False
         
-        # 檢查回應內容
-        if len(response.text.strip()) <= 100:
+        if response is NOT_MODIFIED:
+            self.logger.debug(f"ETF 股利 CSV 未變更，沿用本地檔案: {csv_path}")
+            return True
+        
+        headers = response.headers
+        
+        # 檢查回應內容 (以位元組判斷，避免 response.text 觸發編碼偵測)
+        if len(response.content.strip()) <= 100:
             self.logger.warning("CSV 回應內容過短")
             return False
         
@@ -89,8 +109,12 @@ class ETFDownloader(BaseDownloader):
         if not self.save_response_to_file(response, csv_path, "utf-8-sig"):
             return False
         
-        # 驗證 CSV 檔案
-        return self._validate_csv_file(csv_path)
+        # 驗證 CSV 檔案，通過後才記錄 ETag / Last-Modified
+        if not self._validate_csv_file(csv_path):
+            return False
+        
+        self._update_http_cache(csv_path, headers)
+        return True
     
     def _download_json_as_csv(self, json_url: str, csv_path: str) -> bool:
         """
@@ -111,7 +135,8 @@ class ETFDownloader(BaseDownloader):
             return False
         
         try:
-            data = response.json()
+            # orjson 直接解析位元組，省去一次完整的文字解碼
+            data = orjson.loads(response.content) if HAS_ORJSON else response.json()
             
             # 檢查是否有資料
             if 'data' not in data or len(data['data']) == 0:
@@ -127,11 +152,16 @@ class ETFDownloader(BaseDownloader):
                 self.logger.warning("JSON 資料格式異常")
                 return False
             
-            # 轉換為 DataFrame 並儲存為 CSV
-            df = pd.DataFrame(rows, columns=fields)
-            df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+            # 直接逐列寫出 CSV
+            with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                writer.writerows(rows)
+            
+            # 檔案改由 JSON 產生，移除 CSV 網址的條件式請求紀錄
+            self._update_http_cache(csv_path, {})
             
-            self.logger.success(f"ETF 股利 JSON→CSV 轉換成功: {len(df)} 筆資料")
+            self.logger.success(f"ETF 股利 JSON→CSV 轉換成功: {len(rows)} 筆資料")
             return True
             
         except Exception as e:
@@ -149,9 +179,13 @@ class ETFDownloader(BaseDownloader):
             是否為有效的 CSV 檔案
         """
         try:
-            test_df = pd.read_csv(csv_path, encoding="utf-8-sig", nrows=5)
+            with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                # 略過空白列，只需確認有一列資料
+                first_row = next((row for row in reader if row), None)
             
-            if test_df.empty or len(test_df.columns) <= 3:
+            if not header or len(header) <= 3 or first_row is None:
                 self.logger.warning("CSV 檔案格式異常")
                 if os.path.exists(csv_path):
                     os.remove(csv_path)
@@ -164,4 +198,4 @@ class ETFDownloader(BaseDownloader):
             self.logger.warning(f"CSV 檔案讀取失敗: {e}")
             if os.path.exists(csv_path):
                 os.remove(csv_path)
-            return False
\ No newline at end of file
+            return False
@@ -4,15 +4,22 @@ Selenium 基礎下載器
 
 提供基於 Selenium 的自動化瀏覽器下載功能，支援登入、檔案下載監控等
 """
+import atexit
 import os
+import queue
+import re
+import threading
 import time
 import json
 import pickle
 import base64
+import zlib
 from abc import abstractmethod
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict
+from typing import Any, Optional, Tuple, List, Dict
+from urllib.parse import unquote, urlparse
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -32,13 +39,202 @@ try:
 except ImportError:
     HAS_WEBDRIVER_MANAGER = False
 
-from .base_downloader import BaseDownloader
-from config.settings import LOG_DIR_BASE
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+from .base_downloader import BaseDownloader, STREAM_CHUNK_SIZE, WRITE_BUFFER_SIZE
+from config.settings import LOG_DIR_BASE, CHROME_PROFILE_DIR, SELENIUM_CACHE_DIR
+
+
+# 下載流程用不到的資源 (圖片、字型、影音、追蹤與廣告)，透過 CDP 阻擋以加快頁面載入
+BLOCKED_RESOURCE_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*", "*googlesyndication*",
+)
+
+# 與 chromedriver 之間 HTTP 連線池的大小 (多個等待並行時避免 "Connection pool is full")
+COMMAND_POOL_MAXSIZE = 20
+
+# Content-Disposition 標頭中的檔名 (支援 RFC 5987 filename*=UTF-8''...)
+_DISPOSITION_FILENAME_RE = re.compile(r"filename\*?=(?:[\w-]+'[^']*')?\"?([^\";]+)", re.IGNORECASE)
+
+
+def _dump_cookies(cookies: List[Dict]) -> bytes:
+    """序列化 cookies 為 JSON 位元組"""
+    if HAS_ORJSON:
+        return orjson.dumps(cookies)
+    return json.dumps(cookies).encode("utf-8")
+
+
+# 壓縮格式 Cookie 環境變數的前綴 (zlib + Base85)，未帶前綴者視為舊版 Base64 JSON
+COOKIES_BLOB_PREFIX = "z85:"
+
+
+def _encode_cookies_blob(payload: bytes) -> str:
+    """將 cookies JSON 位元組壓縮並以 Base85 編碼，供存放於 CI Secret"""
+    return COOKIES_BLOB_PREFIX + base64.b85encode(zlib.compress(payload, 9)).decode("ascii")
+
+
+def _decode_cookies_blob(blob: str) -> bytes:
+    """解碼 CI Secret 中的 cookies 資料 (支援壓縮格式與舊版 Base64)"""
+    blob = blob.strip()
+    if blob.startswith(COOKIES_BLOB_PREFIX):
+        return zlib.decompress(base64.b85decode(blob[len(COOKIES_BLOB_PREFIX):]))
+    return base64.b64decode(blob)
+
+
+def _parse_cookies(data: bytes) -> List[Dict]:
+    """解析 cookies 資料：依開頭位元組判斷格式 (pickle 以 0x80 開頭，其餘視為 JSON)"""
+    if data[:1] == b"\x80":
+        # 舊版 pickle 格式 (protocol 2+)
+        return pickle.loads(data)
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data.decode("utf-8"))
+
+
+@lru_cache(maxsize=4)
+def _load_cookies_cached(path_str: str, mtime_ns: int) -> Tuple[Dict, ...]:
+    """讀取並解析 cookies 檔案 (以路徑與修改時間為鍵快取，檔案重新儲存後自動失效)"""
+    with open(path_str, 'rb') as f:
+        return tuple(_parse_cookies(f.read()))
+
+
+@lru_cache(maxsize=1)
+def _get_chromedriver_path() -> str:
+    """取得 ChromeDriver 路徑 (同一程序只由 webdriver-manager 解析一次)"""
+    return ChromeDriverManager().install()
+
+
+def _tune_command_connection(driver: webdriver.Chrome) -> None:
+    """
+    放大 WebDriver 指令連線池並沿用 keep-alive 連線
+    
+    Selenium 預設以 keep-alive 的 urllib3 PoolManager 傳送指令，但每個主機只保留 1 條連線；
+    更新建立連線池的參數後清空既有連線池，之後的指令即以較大的池重複使用連線
+    """
+    executor = getattr(driver, 'command_executor', None)
+    if executor is None:
+        return
+    if hasattr(executor, 'keep_alive'):
+        executor.keep_alive = True
+    conn = getattr(executor, '_conn', None)
+    pool_kw = getattr(conn, 'connection_pool_kw', None)
+    if pool_kw is None:
+        return
+    pool_kw['maxsize'] = COMMAND_POOL_MAXSIZE
+    pool_kw['block'] = False
+    conn.clear()
+
+
+class DriverPool:
+    """程序層級的 Chrome WebDriver 池 - 重複使用已啟動的瀏覽器，避免每次下載都冷啟動 Chrome"""
+    
+    _idle: "queue.Queue[webdriver.Chrome]" = queue.Queue()
+    _drivers: List[webdriver.Chrome] = []
+    _lock = threading.Lock()
+    _closed = False
+    
+    @classmethod
+    def acquire(cls) -> Optional[webdriver.Chrome]:
+        """
+        取得閒置中的 WebDriver
+        
+        Returns:
+            可用的 WebDriver，池中沒有存活的瀏覽器時回傳 None
+        """
+        while True:
+            try:
+                driver = cls._idle.get_nowait()
+            except queue.Empty:
+                return None
+            
+            try:
+                # 確認瀏覽器仍存活
+                driver.current_url
+                return driver
+            except Exception:
+                cls.discard(driver)
+    
+    @classmethod
+    def register(cls, driver: webdriver.Chrome) -> None:
+        """登記新建立的 WebDriver，程序結束時統一關閉"""
+        with cls._lock:
+            cls._drivers.append(driver)
+    
+    @classmethod
+    def size(cls) -> int:
+        """目前程序中已啟動的 WebDriver 數量"""
+        with cls._lock:
+            return len(cls._drivers)
+    
+    @classmethod
+    def release(cls, driver: webdriver.Chrome) -> None:
+        """
+        歸還 WebDriver：清除 cookies 並回到空白頁後放回池中
+        
+        Args:
+            driver: 使用完畢的 WebDriver
+        """
+        if cls._closed:
+            cls.discard(driver)
+            return
+        
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.get("about:blank")
+        except Exception:
+            cls.discard(driver)
+            return
+        
+        cls._idle.put(driver)
+    
+    @classmethod
+    def discard(cls, driver: webdriver.Chrome) -> None:
+        """關閉 WebDriver 並從池中移除"""
+        with cls._lock:
+            if driver in cls._drivers:
+                cls._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    @classmethod
+    def close_all(cls) -> None:
+        """關閉池中所有 WebDriver（程序結束時由 atexit 呼叫）"""
+        with cls._lock:
+            cls._closed = True
+            drivers = list(cls._drivers)
+            cls._drivers.clear()
+        
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+atexit.register(DriverPool.close_all)
 
 
 class SeleniumBaseDownloader(BaseDownloader):
     """Selenium 下載器基礎類別 - 提供瀏覽器自動化功能"""
     
+    # 是否阻擋圖片/字型/影音載入（需要圖片的子類可設為 False）
+    block_resources: bool = True
+    # 每個新文件載入前自動執行的 JavaScript（透過 CDP 於瀏覽器端執行，不需逐次往返）
+    init_scripts: Tuple[str, ...] = ()
+    
     def __init__(self, logger, download_dir: str):
         """
         初始化 Selenium 下載器
@@ -53,6 +249,13 @@ class SeleniumBaseDownloader(BaseDownloader):
         
         self.driver: Optional[webdriver.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
+        
+        # 最近一次以 CDP 寫入的 cookies (name -> value)，供呼叫端驗證而不必再向瀏覽器查詢
+        self.loaded_cookies: Dict[str, str] = {}
+        
+        # 等待下載中的喚醒事件，由 CDP 下載進度事件觸發
+        self._download_waiters: set = set()
+        self._download_waiters_lock = threading.Lock()
     
     def _init_driver(self) -> None:
         """初始化 Chrome WebDriver（支援 headless 模式，使用 undetected-chromedriver 繞過檢測）"""
@@ -76,11 +279,23 @@ class SeleniumBaseDownloader(BaseDownloader):
         }
         
         try:
-            if HAS_UC and not is_ci:
+            self.driver = DriverPool.acquire()
+            reused = self.driver is not None
+            
+            if reused:
+                # 重複使用池中已啟動的瀏覽器，下載目錄由下方 CDP 指令重新設定
+                self.logger.info("重複使用已啟動的 Chrome WebDriver")
+            elif HAS_UC and not is_ci:
                 # 使用 undetected-chromedriver 繞過 Google 驗證
                 options = uc.ChromeOptions()
                 options.add_experimental_option("prefs", prefs)
                 
+                # 沿用固定的設定檔，省去 Chrome 首次啟動的初始化
+                profile_dir = self._persistent_profile_dir()
+                if profile_dir:
+                    options.add_argument(f'--user-data-dir={profile_dir}')
+                    options.add_argument('--profile-directory=Default')
+                
                 options.add_argument('--ignore-certificate-errors')
                 options.add_argument('--ignore-ssl-errors')
                 options.add_argument('--disable-blink-features=AutomationControlled')
@@ -99,7 +314,10 @@ class SeleniumBaseDownloader(BaseDownloader):
                 # 設定更真實的 user agent
                 options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
                 
-                self.driver = uc.Chrome(options=options, version_main=None, use_subprocess=False)
+                # 啟用 CDP 事件以接收下載進度通知
+                self.driver = uc.Chrome(
+                    options=options, version_main=None, use_subprocess=False, enable_cdp_events=True
+                )
                 
                 # 移除 webdriver 特徵
                 self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
@@ -112,16 +330,21 @@ class SeleniumBaseDownloader(BaseDownloader):
                 # CI 環境或未安裝 undetected-chromedriver，使用標準 webdriver
                 chrome_options = Options()
                 
-                # 使用臨時用戶配置檔，避免密碼警告
-                import tempfile
-                temp_profile = tempfile.mkdtemp(prefix="chrome_profile_")
-                chrome_options.add_argument(f'--user-data-dir={temp_profile}')
+                # 本地沿用固定設定檔；CI 或設定檔已被使用時改用臨時用戶配置檔，避免密碼警告
+                profile_dir = self._persistent_profile_dir(is_ci)
+                if profile_dir is None:
+                    import tempfile
+                    profile_dir = tempfile.mkdtemp(prefix="chrome_profile_")
+                chrome_options.add_argument(f'--user-data-dir={profile_dir}')
                 
                 if is_ci:
-                    chrome_options.add_argument('--headless')
+                    # 新版 headless 模式：啟動較快、記憶體較少，行為與一般 Chrome 一致
+                    chrome_options.add_argument('--headless=new')
                     chrome_options.add_argument('--no-sandbox')
                     chrome_options.add_argument('--disable-dev-shm-usage')
                     chrome_options.add_argument('--disable-gpu')
+                    if self.block_resources:
+                        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
                     self.logger.info("偵測到 CI 環境，使用 headless 模式")
                 
                 chrome_options.add_argument('--disable-features=PasswordLeakDetection')
@@ -140,14 +363,19 @@ class SeleniumBaseDownloader(BaseDownloader):
                 
                 # 使用 webdriver-manager 自動管理 ChromeDriver
                 if HAS_WEBDRIVER_MANAGER:
-                    service = Service(ChromeDriverManager().install())
+                    service = Service(_get_chromedriver_path())
                     self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 else:
-                    # 假設系統已安裝 chromedriver
+                    # 由 Selenium Manager 取得 chromedriver，並快取於固定目錄
+                    os.environ.setdefault("SE_CACHE_PATH", SELENIUM_CACHE_DIR)
                     self.driver = webdriver.Chrome(options=chrome_options)
                 
                 self.logger.info("使用標準 Chrome WebDriver")
             
+            if not reused:
+                _tune_command_connection(self.driver)
+                DriverPool.register(self.driver)
+            
             self.wait = WebDriverWait(self.driver, 10)
             # 透過 CDP 允許多檔案下載，避免第二次下載被阻擋
             try:
@@ -162,19 +390,98 @@ class SeleniumBaseDownloader(BaseDownloader):
             except Exception as _e:
                 # 某些環境（老舊 Chrome/Chromium）可能不支援，忽略
                 self.logger.debug(f"CDP 設定多檔下載失敗（可忽略）: {_e}")
+            # 池中的瀏覽器可能由其他子類使用過，每次都重新設定阻擋清單
+            try:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+                self.driver.execute_cdp_cmd(
+                    'Network.setBlockedURLs',
+                    {'urls': list(BLOCKED_RESOURCE_PATTERNS) if self.block_resources else []},
+                )
+            except Exception as _e:
+                self.logger.debug(f"CDP 設定資源阻擋失敗（可忽略）: {_e}")
+            self._install_init_scripts()
+            self._register_download_listener()
             self.logger.success("Chrome WebDriver 初始化成功")
         except Exception as e:
             self.logger.error(f"Chrome WebDriver 初始化失敗: {e}")
             raise
     
+    def _install_init_scripts(self) -> None:
+        """以 CDP 註冊 init_scripts（同一瀏覽器已註冊過的腳本不重複註冊）"""
+        installed = getattr(self.driver, '_installed_init_scripts', None)
+        if installed is None:
+            installed = set()
+            self.driver._installed_init_scripts = installed
+        
+        for source in self.init_scripts:
+            if source in installed:
+                continue
+            try:
+                self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': source})
+                installed.add(source)
+            except Exception as _e:
+                self.logger.debug(f"CDP 註冊頁面腳本失敗（可忽略）: {_e}")
+    
+    def _register_download_listener(self) -> None:
+        """
+        訂閱 CDP 下載進度事件（僅 undetected-chromedriver 支援事件監聽）
+        
+        下載完成時立即喚醒等待中的 _wait_for_download_complete，不必等到下次檔案掃描
+        """
+        if not hasattr(self.driver, 'add_cdp_listener'):
+            return
+        
+        # 池中的瀏覽器可能被其他下載器重複使用，監聽器只註冊一次並轉交給目前的使用者
+        self.driver._download_listener_owner = self
+        if getattr(self.driver, '_download_listener_registered', False):
+            return
+        
+        driver = self.driver
+        
+        def _on_download_progress(message: Dict) -> None:
+            owner = getattr(driver, '_download_listener_owner', None)
+            state = message.get('params', {}).get('state')
+            if owner is not None and state in ('completed', 'canceled'):
+                owner._notify_download_waiters()
+        
+        try:
+            for event in ('Page.downloadProgress', 'Browser.downloadProgress'):
+                driver.add_cdp_listener(event, _on_download_progress)
+            driver._download_listener_registered = True
+        except Exception as _e:
+            self.logger.debug(f"CDP 下載事件訂閱失敗（可忽略）: {_e}")
+    
+    def _notify_download_waiters(self) -> None:
+        """喚醒所有等待中的下載檢查"""
+        with self._download_waiters_lock:
+            for waiter in self._download_waiters:
+                waiter.set()
+    
+    @staticmethod
+    def _persistent_profile_dir(is_ci: bool = False) -> Optional[str]:
+        """
+        取得可沿用的 Chrome 設定檔目錄
+        
+        Args:
+            is_ci: 是否在 CI 環境
+            
+        Returns:
+            設定檔目錄；CI 環境或已有瀏覽器使用該設定檔時返回 None
+        """
+        # 同一設定檔無法被兩個 Chrome 程序同時使用
+        if is_ci or DriverPool.size() > 0:
+            return None
+        os.makedirs(CHROME_PROFILE_DIR, exist_ok=True)
+        return CHROME_PROFILE_DIR
+    
     def _close_driver(self) -> None:
-        """關閉並清理 WebDriver 資源"""
+        """歸還 WebDriver 至瀏覽器池（實際關閉由程序結束時統一處理）"""
         if self.driver:
             try:
-                self.driver.quit()
-                self.logger.debug("Chrome WebDriver 已關閉")
+                DriverPool.release(self.driver)
+                self.logger.debug("Chrome WebDriver 已歸還瀏覽器池")
             except Exception as e:
-                self.logger.warning(f"關閉 WebDriver 時發生錯誤: {e}")
+                self.logger.warning(f"歸還 WebDriver 時發生錯誤: {e}")
             finally:
                 self.driver = None
                 self.wait = None
@@ -196,8 +503,8 @@ class SeleniumBaseDownloader(BaseDownloader):
             cookies = self.driver.get_cookies()
             cookies_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(cookies_path, 'w', encoding='utf-8') as f:
-                json.dump(cookies, f, indent=2)
+            with open(cookies_path, 'wb') as f:
+                f.write(_dump_cookies(cookies))
             
             self.logger.success(f"Cookies 已儲存 (JSON): {cookies_path}")
             return True
@@ -205,12 +512,19 @@ class SeleniumBaseDownloader(BaseDownloader):
             self.logger.error(f"儲存 cookies 失敗: {e}")
             return False
     
-    def load_cookies(self, cookies_data: str = None, cookies_path: Path = None) -> bool:
+    def load_cookies(
+        self,
+        cookies_data: str = None,
+        cookies_path: Path = None,
+        url: Optional[str] = None
+    ) -> bool:
         """載入 cookies（從環境變數或檔案）
         
         Args:
             cookies_data: Base64 編碼的 cookies 資料（來自環境變數）
             cookies_path: cookies 檔案路徑（本地測試用）
+            url: 指定時改以 CDP Network.setCookie 寫入此網址的 cookies，
+                 可在第一次導覽前呼叫，不需先開啟同網域頁面
             
         Returns:
             是否成功載入
@@ -226,31 +540,25 @@ class SeleniumBaseDownloader(BaseDownloader):
             if cookies_data:
                 self.logger.debug("從環境變數載入 cookies...")
                 try:
-                    # 嘗試以 Base64 JSON -> list 解碼
-                    cookies_data = cookies_data.strip()
-                    decoded = base64.b64decode(cookies_data)
-                    try:
-                        cookies = json.loads(decoded.decode('utf-8'))
-                    except Exception:
-                        # 回退為 Base64 pickle
-                        cookies = pickle.loads(decoded)
+                    # 壓縮格式 (z85:) 或舊版 Base64 JSON -> list 解碼
+                    cookies = _parse_cookies(_decode_cookies_blob(cookies_data))
                 except Exception as e:
                     self.logger.warning(f"Cookie 解碼失敗，可能格式錯誤: {e}")
                     return False
             # 其次使用本地檔案
             elif cookies_path and cookies_path.exists():
                 self.logger.debug(f"從檔案載入 cookies: {cookies_path}")
-                # 先嘗試 JSON，失敗再回退 pickle
-                try:
-                    with open(cookies_path, 'r', encoding='utf-8') as f:
-                        cookies = json.load(f)
-                except Exception:
-                    with open(cookies_path, 'rb') as f:
-                        cookies = pickle.load(f)
+                # 依內容判斷 JSON 或舊版 pickle；同一版本的檔案只解析一次，
+                # 複製每個 cookie 以免下方修改影響快取內容
+                cached = _load_cookies_cached(str(cookies_path), cookies_path.stat().st_mtime_ns)
+                cookies = [dict(cookie) for cookie in cached]
             else:
                 self.logger.debug("沒有找到 cookies")
                 return False
             
+            if url:
+                return self._set_cookies_via_cdp(cookies, url)
+            
             # 清除現有 cookies 以免與新載入的衝突
             self.driver.delete_all_cookies()
             
@@ -285,6 +593,58 @@ class SeleniumBaseDownloader(BaseDownloader):
             self.logger.error(f"載入 cookies 失敗: {e}")
             return False
     
+    def _set_cookies_via_cdp(self, cookies: List[Dict], url: str) -> bool:
+        """
+        以 CDP Network.setCookies 一次寫入所有 cookies（不需先導覽至該網域）
+        
+        Args:
+            cookies: Selenium 格式的 cookies
+            url: cookies 所屬網址 (cookie 未帶 domain 時以此決定網域)
+            
+        Returns:
+            是否成功載入至少一個 cookie
+        """
+        cdp_cookies = []
+        for cookie in cookies:
+            # 與 add_cookie 路徑相同，不帶 expiry 以 session cookie 寫入
+            params = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'url': url,
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+            }
+            if cookie.get('domain'):
+                params['domain'] = cookie['domain']
+            if cookie.get('sameSite'):
+                params['sameSite'] = cookie['sameSite']
+            cdp_cookies.append(params)
+        
+        self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        
+        try:
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies})
+            loaded = cdp_cookies
+        except Exception as e:
+            # 批次中任一 cookie 無效時整批失敗，改為逐一寫入以略過無效項目
+            self.logger.debug(f"批次寫入 cookies 失敗，改為逐一寫入: {e}")
+            loaded = []
+            for params in cdp_cookies:
+                try:
+                    if self.driver.execute_cdp_cmd('Network.setCookie', params).get('success', True):
+                        loaded.append(params)
+                except Exception as e:
+                    self.logger.debug(f"跳過無效 cookie (name={params['name']}): {e}")
+        
+        if not loaded:
+            self.logger.error("沒有成功載入任何 cookies")
+            return False
+        
+        self.loaded_cookies = {c['name']: c['value'] for c in loaded}
+        self.logger.success(f"成功載入 {len(loaded)}/{len(cookies)} 個 cookies (CDP)")
+        return True
+    
     def _take_screenshot(self, name: str = "error") -> None:
         """
         擷取當前頁面截圖（用於除錯）
@@ -306,7 +666,8 @@ class SeleniumBaseDownloader(BaseDownloader):
     def _wait_for_download_complete(
         self, 
         expected_filename: Optional[str] = None,
-        timeout: int = 60
+        timeout: int = 60,
+        download_dir: Optional[Path] = None
     ) -> Optional[Path]:
         """
         等待下載完成
@@ -314,44 +675,152 @@ class SeleniumBaseDownloader(BaseDownloader):
         Args:
             expected_filename: 預期的檔案名稱（可選）
             timeout: 超時秒數
+            download_dir: 監看的下載目錄（預設為 self.download_dir）
             
         Returns:
             下載完成的檔案路徑，失敗則返回 None
         """
         self.logger.progress("等待檔案下載完成...")
+        download_dir = download_dir or self.download_dir
+        
+        # 檔案系統事件或 CDP 下載進度事件都會喚醒此事件，立即重新檢查
+        wakeup = threading.Event()
+        with self._download_waiters_lock:
+            self._download_waiters.add(wakeup)
+        try:
+            if HAS_WATCHDOG:
+                downloaded = self._wait_for_download_event(expected_filename, timeout, download_dir, wakeup)
+            else:
+                downloaded = self._poll_for_download(expected_filename, timeout, download_dir, wakeup)
+        finally:
+            with self._download_waiters_lock:
+                self._download_waiters.discard(wakeup)
+        
+        if downloaded and self._wait_for_download_stable(downloaded):
+            self.logger.success(f"檔案下載完成: {downloaded.name}")
+            return downloaded
+        
+        self.logger.error(f"下載超時（{timeout} 秒）")
+        return None
+    
+    def _wait_for_download_stable(self, path: Path, timeout: int = 10, stable_ms: int = 500) -> bool:
+        """
+        確認檔案大小與修改時間在 stable_ms 內不再變動（取代下載後的固定等待）
         
-        elapsed = 0
-        while elapsed < timeout:
+        Args:
+            path: 下載的檔案路徑
+            timeout: 超時秒數
+            stable_ms: 視為穩定所需的毫秒數
+            
+        Returns:
+            檔案是否已穩定
+        """
+        deadline = time.monotonic() + timeout
+        last = None
+        stable_since = time.monotonic()
+        while time.monotonic() < deadline:
             try:
-                files = list(self.download_dir.glob('*'))
-                # 過濾掉未完成的下載檔案
-                valid_files = [f for f in files if not f.name.endswith('.crdownload') and not f.name.endswith('.tmp')]
-                
-                if valid_files:
-                    # 如果指定了檔名，尋找匹配的檔案
-                    if expected_filename:
-                        for f in valid_files:
-                            if f.name == expected_filename:
-                                # 確認檔案是最近下載的
-                                if (time.time() - f.stat().st_ctime) < 120:
-                                    self.logger.success(f"檔案下載完成: {f.name}")
-                                    return f
-                    else:
-                        # 否則返回最新的檔案
-                        latest_file = max(valid_files, key=lambda x: x.stat().st_ctime)
-                        if (time.time() - latest_file.stat().st_ctime) < 120:
-                            self.logger.success(f"檔案下載完成: {latest_file.name}")
-                            return latest_file
+                st = path.stat()
+            except FileNotFoundError:
+                return False
+            current = (st.st_size, st.st_mtime_ns)
+            now = time.monotonic()
+            if current != last:
+                last, stable_since = current, now
+            elif (now - stable_since) * 1000 >= stable_ms:
+                return True
+            time.sleep(0.2)
+        return False
+    
+    def _find_completed_download(
+        self,
+        expected_filename: Optional[str] = None,
+        download_dir: Optional[Path] = None
+    ) -> Optional[Path]:
+        """掃描下載目錄一次，回傳最近完成的下載檔案"""
+        download_dir = download_dir or self.download_dir
+        
+        # 已知檔名時直接檢查單一檔案，不需列出整個目錄
+        if expected_filename:
+            target = download_dir / expected_filename
+            try:
+                if (time.time() - target.stat().st_ctime) < 120:
+                    return target
+            except FileNotFoundError:
+                pass
+            return None
+        
+        files = list(download_dir.glob('*'))
+        # 過濾掉未完成的下載檔案
+        valid_files = [
+            f for f in files
+            if not f.name.endswith('.crdownload') and not f.name.endswith('.tmp') and f.is_file()
+        ]
+        
+        if not valid_files:
+            return None
+        
+        # 返回最新的檔案
+        latest_file = max(valid_files, key=lambda x: x.stat().st_ctime)
+        if (time.time() - latest_file.stat().st_ctime) < 120:
+            return latest_file
+        return None
+    
+    def _wait_for_download_event(
+        self,
+        expected_filename: Optional[str],
+        timeout: int,
+        download_dir: Path,
+        changed: threading.Event
+    ) -> Optional[Path]:
+        """以檔案系統事件喚醒，僅在目錄有變動時重新掃描"""
+        handler = FileSystemEventHandler()
+        handler.on_any_event = lambda event: changed.set()
+        
+        observer = Observer()
+        observer.schedule(handler, str(download_dir), recursive=False)
+        observer.start()
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                changed.clear()
+                try:
+                    downloaded = self._find_completed_download(expected_filename, download_dir)
+                    if downloaded:
+                        return downloaded
+                except Exception as e:
+                    self.logger.warning(f"檢查下載狀態時發生錯誤: {e}")
                 
-                time.sleep(2)
-                elapsed += 2
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                changed.wait(remaining)
+        finally:
+            observer.stop()
+            observer.join()
+    
+    def _poll_for_download(
+        self,
+        expected_filename: Optional[str],
+        timeout: int,
+        download_dir: Path,
+        wakeup: threading.Event
+    ) -> Optional[Path]:
+        """每 2 秒輪詢下載目錄，收到 CDP 下載事件時提前檢查 (未安裝 watchdog 時使用)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wakeup.clear()
+            try:
+                downloaded = self._find_completed_download(expected_filename, download_dir)
+                if downloaded:
+                    return downloaded
             except Exception as e:
                 self.logger.warning(f"檢查下載狀態時發生錯誤: {e}")
-                time.sleep(2)
-                elapsed += 2
-        
-        self.logger.error(f"下載超時（{timeout} 秒）")
-        return None
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            wakeup.wait(min(2, remaining))
     
     @abstractmethod
     def _perform_login(self) -> bool:
@@ -373,6 +842,67 @@ class SeleniumBaseDownloader(BaseDownloader):
         """
         pass
     
+    def _direct_download_url(self) -> Optional[Tuple[str, str, Optional[Dict[str, Any]]]]:
+        """
+        登入後可直接以 HTTP 下載的網址（子類可覆寫）
+        
+        若下載只是單純的連結或表單送出，子類回傳 (url, method, payload) 後，
+        登入後的下載改以 requests 搭配瀏覽器 cookies 完成，不再操作瀏覽器
+        
+        Returns:
+            (網址, HTTP 方法, 表單資料)，回傳 None 則使用 _trigger_download
+        """
+        return None
+    
+    def _download_with_browser_cookies(
+        self,
+        url: str,
+        method: str = "GET",
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Optional[Path]:
+        """
+        以瀏覽器登入後的 cookies 直接透過 HTTP 下載檔案
+        
+        Args:
+            url: 下載網址
+            method: HTTP 方法
+            payload: 表單資料（POST 時使用）
+            
+        Returns:
+            下載完成的檔案路徑，失敗則返回 None
+        """
+        session = self._get_session()
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain', ''), path=cookie.get('path', '/')
+            )
+        
+        response = self.make_request(url, method=method, data=payload)
+        if response is None:
+            return None
+        
+        match = _DISPOSITION_FILENAME_RE.search(response.headers.get('Content-Disposition', ''))
+        filename = os.path.basename(unquote(match.group(1)) if match else urlparse(url).path)
+        file_path = self.download_dir / (filename or "download")
+        tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+        
+        try:
+            # 以原始位元組寫入（可能為 Excel 等二進位檔，不做轉碼）
+            with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            self.logger.error(f"直接下載失敗 {url}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+        finally:
+            response.close()
+        
+        self.logger.success(f"檔案下載完成（直接 HTTP）: {file_path.name}")
+        return file_path
+    
     def download_data(self, year: str = None, output_dir: str = None) -> Tuple[bool, Optional[Path]]:
         """
         執行完整的下載流程
@@ -385,8 +915,9 @@ class SeleniumBaseDownloader(BaseDownloader):
             (是否成功, 下載的檔案路徑)
         """
         try:
-            # 初始化瀏覽器
-            self._init_driver()
+            # 初始化瀏覽器（以 with 使用時已於 __enter__ 初始化）
+            if self.driver is None:
+                self._init_driver()
             
             # 執行登入
             if not self._perform_login():
@@ -394,6 +925,14 @@ class SeleniumBaseDownloader(BaseDownloader):
                 self._take_screenshot("login_failed")
                 return False, None
             
+            # 可直接以 HTTP 下載時，不再透過瀏覽器觸發
+            direct = self._direct_download_url()
+            if direct is not None:
+                downloaded_file = self._download_with_browser_cookies(*direct)
+                if not downloaded_file:
+                    return False, None
+                return True, downloaded_file
+            
             # 觸發下載
             if not self._trigger_download():
                 self.logger.error("觸發下載失敗")
@@ -420,7 +959,27 @@ class SeleniumBaseDownloader(BaseDownloader):
             # 確保資源被清理
             self._close_driver()
     
-    def __del__(self):
-        """確保資源被釋放"""
+    def __enter__(self) -> "SeleniumBaseDownloader":
+        """
+        以 context manager 使用時初始化瀏覽器（建議用法，確保離開區塊時釋放 WebDriver）
+        
+        範例:
+            with SomeSeleniumDownloader(logger, download_dir) as downloader:
+                downloader.download_data()
+        """
+        self._init_driver()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
         self._close_driver()
+        return False
+    
+    def __del__(self):
+        """確保資源被釋放（備援機制，程序結束時可能不會被呼叫）"""
+        try:
+            if getattr(self, 'driver', None) is not None:
+                self._close_driver()
+        except Exception:
+            # 直譯器關閉階段模組可能已被清除，忽略錯誤
+            pass
         super().__del__()
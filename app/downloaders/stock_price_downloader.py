@@ -7,14 +7,29 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import re
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from .base_downloader import BaseDownloader
 from config.api_urls import get_twse_stock_url, get_tpex_stock_url
 from config.settings import RAW_DATA_DIR, RAW_DATA_RETENTION_DAYS
 
+# 原始資料檔名格式: YYYYMMDD_*_raw.json，擷取日期部分
+_DATE_RE = re.compile(r'^(\d{8})(?:_.*)?_raw\.json$')
+
 
 class StockPriceDownloader(BaseDownloader):
     """股價下載器 - 負責原始資料下載"""
     
+    def __init__(self, logger):
+        super().__init__(logger)
+        # 股價原始資料目錄只在建立時計算並建立一次
+        self._stock_raw_dir = os.path.join(RAW_DATA_DIR, "stock_prices")
+        os.makedirs(self._stock_raw_dir, exist_ok=True)
+    
     def download_data(self, output_dir: str = None) -> Tuple[bool, Dict[str, List[Dict]]]:
         """
         下載最新股價資料
@@ -25,8 +40,10 @@ class StockPriceDownloader(BaseDownloader):
         self.logger.progress("開始下載最新股價資料...")
         
         # 1. 同時抓取上市和上櫃資料
-        twse_data = self._fetch_twse_data()
-        tpex_data = self._fetch_tpex_data()
+        executor = self._get_executor()
+        twse_future = executor.submit(self._fetch_twse_data)
+        tpex_future = executor.submit(self._fetch_tpex_data)
+        twse_data, tpex_data = twse_future.result(), tpex_future.result()
         
         if not twse_data and not tpex_data:
             self.logger.error("上市和上櫃資料都無法取得")
@@ -55,58 +72,57 @@ class StockPriceDownloader(BaseDownloader):
     def _save_raw_data(self, raw_data: Dict[str, List[Dict]]) -> None:
         """儲存原始資料到 raw_data 目錄"""
         try:
-            # 建立股價原始資料目錄
-            stock_raw_dir = os.path.join(RAW_DATA_DIR, "stock_prices")
-            os.makedirs(stock_raw_dir, exist_ok=True)
-            
             # 使用當前日期作為檔名
             current_date = datetime.now().strftime('%Y%m%d')
             
             # 儲存上市資料
             if 'twse' in raw_data:
-                twse_file = os.path.join(stock_raw_dir, f"{current_date}_twse_raw.json")
-                with open(twse_file, 'w', encoding='utf-8') as f:
-                    json.dump(raw_data['twse'], f, ensure_ascii=False, indent=2)
+                twse_file = os.path.join(self._stock_raw_dir, f"{current_date}_twse_raw.json")
+                self._write_json(twse_file, raw_data['twse'])
                 self.logger.debug(f"上市原始資料已儲存: {twse_file}")
             
             # 儲存上櫃資料
             if 'tpex' in raw_data:
-                tpex_file = os.path.join(stock_raw_dir, f"{current_date}_tpex_raw.json")
-                with open(tpex_file, 'w', encoding='utf-8') as f:
-                    json.dump(raw_data['tpex'], f, ensure_ascii=False, indent=2)
+                tpex_file = os.path.join(self._stock_raw_dir, f"{current_date}_tpex_raw.json")
+                self._write_json(tpex_file, raw_data['tpex'])
                 self.logger.debug(f"上櫃原始資料已儲存: {tpex_file}")
             
         except Exception as e:
             self.logger.warning(f"儲存原始資料失敗: {e}")
     
+    @staticmethod
+    def _write_json(file_path: str, data) -> None:
+        """一次寫出緊湊格式的 JSON (原始資料僅供程式讀取)"""
+        if HAS_ORJSON:
+            with open(file_path, 'wb') as f:
+                f.write(orjson.dumps(data))
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    
+    @staticmethod
+    def _parse_json(response):
+        """解析回應 JSON (orjson 直接處理位元組)"""
+        if HAS_ORJSON:
+            return orjson.loads(response.content)
+        return response.json()
+    
     def _cleanup_old_raw_data(self) -> None:
         """清理過期的原始資料檔案"""
         try:
-            stock_raw_dir = os.path.join(RAW_DATA_DIR, "stock_prices")
-            if not os.path.exists(stock_raw_dir):
-                return
-            
             # 計算保留截止日期
             cutoff_date = datetime.now() - timedelta(days=RAW_DATA_RETENTION_DAYS)
             cutoff_str = cutoff_date.strftime('%Y%m%d')
             
-            # 取得所有檔案
-            files = os.listdir(stock_raw_dir)
             deleted_count = 0
             
-            for filename in files:
-                if filename.endswith('_raw.json'):
-                    # 解析檔案日期 (格式: YYYYMMDD_*)
-                    try:
-                        file_date_str = filename.split('_')[0]
-                        if len(file_date_str) == 8 and file_date_str.isdigit():
-                            if file_date_str < cutoff_str:
-                                file_path = os.path.join(stock_raw_dir, filename)
-                                os.remove(file_path)
-                                deleted_count += 1
-                                self.logger.debug(f"已刪除過期檔案: {filename}")
-                    except (ValueError, IndexError):
-                        continue
+            with os.scandir(self._stock_raw_dir) as entries:
+                for entry in entries:
+                    match = _DATE_RE.match(entry.name)
+                    if match and match.group(1) < cutoff_str:
+                        os.remove(entry.path)
+                        deleted_count += 1
+                        self.logger.debug(f"已刪除過期檔案: {entry.name}")
             
             if deleted_count > 0:
                 self.logger.info(f"清理完成: 刪除 {deleted_count} 個過期原始資料檔案 (保留 {RAW_DATA_RETENTION_DAYS} 天)")
@@ -124,7 +140,7 @@ class StockPriceDownloader(BaseDownloader):
             if response is None:
                 return None
             
-            data = response.json()
+            data = self._parse_json(response)
             self.logger.debug(f"上市股票原始資料筆數: {len(data) if isinstance(data, list) else 'N/A'}")
             return data if isinstance(data, list) else []
             
@@ -142,7 +158,7 @@ class StockPriceDownloader(BaseDownloader):
             if response is None:
                 return None
             
-            data = response.json()
+            data = self._parse_json(response)
             self.logger.debug(f"上櫃股票原始資料筆數: {len(data) if isinstance(data, list) else 'N/A'}")
             return data if isinstance(data, list) else []
             
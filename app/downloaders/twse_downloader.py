@@ -2,17 +2,27 @@
 TWSE 資料下載工具 - 證交所財務報表下載器
 """
 import os
-import time
-from typing import List, Dict
-from bs4 import BeautifulSoup
+import re
+from typing import List, Set
+from lxml import etree
 
-from .base_downloader import BaseDownloader
+from .async_base_downloader import AsyncBaseDownloader
+from .base_downloader import DownloadTask
 from config.api_urls import get_ajax_url, get_download_url
 from config.settings import MARKETS, SEASONS
 
+# 直接從位元組擷取 <input name="filename" value="..."> 的 value (不限屬性順序)
+_FILENAME_RE = re.compile(
+    rb'<input\b(?=[^>]*\bname\s*=\s*["\']?filename["\'\s/>])[^>]*\bvalue\s*=\s*["\']?([^"\'\s>]+)',
+    re.IGNORECASE
+)
 
-class TWSEDownloader(BaseDownloader):
-    """證交所財務報表下載器"""
+# 可重複使用的 HTML 解析器 (正規表示式失效時的備援)
+_HTML_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+class TWSEDownloader(AsyncBaseDownloader):
+    """證交所財務報表下載器 (檔案以非同步 client 批次下載)"""
     
     def download_data(self, year: str, report_type: str, output_dir: str) -> bool:
         """
@@ -47,35 +57,42 @@ class TWSEDownloader(BaseDownloader):
             unique_filenames, report_type, output_dir
         )
         
-        # 4. 批次下載
+        # 4. 批次下載 (本地已有且未變更的檔案以條件式請求略過)
         success_count = self.batch_download(
             download_tasks, 
             f"{year} {report_type} 下載"
         )
         
+        # 5. 移除本次清單中已不存在的舊檔案
+        self._remove_stale_files(output_dir, {task.path for task in download_tasks})
+        
         return success_count > 0
     
-    def _fetch_all_filenames(self, year: str, report_type: str) -> List[str]:
-        """取得所有檔案名稱"""
-        all_filenames = []
+    def _remove_stale_files(self, output_dir: str, keep_paths: Set[str]) -> None:
+        """
+        移除輸出目錄中不在本次下載清單內的檔案 (目錄不再於下載前清空)
         
-        for market in MARKETS:
-            if report_type == "dividend":
-                # 股利資料不需要季別
-                filenames = self._fetch_filenames_for_market(
-                    year, report_type, market, None
-                )
-                all_filenames.extend(filenames)
-            else:
-                # 其他報表需要各季資料
-                for season in SEASONS:
-                    filenames = self._fetch_filenames_for_market(
-                        year, report_type, market, season
-                    )
-                    all_filenames.extend(filenames)
-                    time.sleep(0.5)  # 避免請求過於頻繁
+        Args:
+            output_dir: 輸出目錄
+            keep_paths: 要保留的檔案路徑
+        """
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.path not in keep_paths:
+                    os.remove(entry.path)
+                    self.logger.debug(f"移除過期檔案: {entry.name}")
+    
+    def _fetch_all_filenames(self, year: str, report_type: str) -> List[str]:
+        """取得所有檔案名稱 (各市場/季別於共用執行緒池並行查詢，由 RATE_LIMITS 控制請求頻率)"""
+        # 股利資料不需要季別，其他報表需要各季資料
+        seasons = [None] if report_type == "dividend" else SEASONS
+        queries = [(market, season) for market in MARKETS for season in seasons]
         
-        return all_filenames
+        results = self._get_executor().map(
+            lambda query: self._fetch_filenames_for_market(year, report_type, *query),
+            queries
+        )
+        return [filename for filenames in results for filename in filenames]
     
     def _fetch_filenames_for_market(
         self, 
@@ -92,10 +109,14 @@ class TWSEDownloader(BaseDownloader):
             if response is None:
                 return []
             
-            response.encoding = "utf-8"
-            soup = BeautifulSoup(response.text, "lxml")
-            input_tags = soup.find_all("input", {"name": "filename"})
-            filenames = [tag.get("value") for tag in input_tags if tag.get("value")]
+            content = response.content
+            filenames = [
+                match.group(1).decode("utf-8") for match in _FILENAME_RE.finditer(content)
+            ]
+            
+            # 正規表示式無結果但頁面含 filename 欄位時，改用 lxml 解析 (頁面結構變動偵測)
+            if not filenames and b"filename" in content:
+                filenames = self._parse_filenames_with_lxml(content)
             
             if filenames:
                 season_info = f" {season}" if season else ""
@@ -108,35 +129,30 @@ class TWSEDownloader(BaseDownloader):
             self.logger.warning(f"取得 {year} {market}{season_info} 檔案清單失敗: {e}")
             return []
     
+    def _parse_filenames_with_lxml(self, content: bytes) -> List[str]:
+        """以 lxml XPath 直接從位元組解析檔案名稱 (正規表示式失效時的備援)"""
+        self.logger.debug("正規表示式未擷取到檔案名稱，改用 lxml 解析")
+        doc = etree.fromstring(content, _HTML_PARSER)
+        if doc is None:
+            return []
+        return [str(value) for value in doc.xpath('//input[@name="filename"]/@value') if value]
+    
     def _remove_duplicates(self, filenames: List[str]) -> List[str]:
-        """移除重複的檔案名稱"""
-        seen = set()
-        unique_filenames = []
-        
-        for filename in filenames:
-            if filename not in seen:
-                seen.add(filename)
-                unique_filenames.append(filename)
-        
-        return unique_filenames
+        """移除重複的檔案名稱 (保留原始順序)"""
+        return list(dict.fromkeys(filenames))
     
     def _create_download_tasks(
         self, 
         filenames: List[str], 
         report_type: str, 
         output_dir: str
-    ) -> List[Dict[str, str]]:
-        """建立下載任務清單"""
-        tasks = []
-        
-        for filename in filenames:
-            download_url = get_download_url(report_type, filename)
-            file_path = os.path.join(output_dir, filename)
-            
-            tasks.append({
-                "url": download_url,
-                "path": file_path,
-                "encoding": "big5"  # TWSE 檔案通常是 big5 編碼
-            })
-        
-        return tasks
\ No newline at end of file
+    ) -> List[DownloadTask]:
+        """建立下載任務清單 (TWSE 檔案通常是 big5 編碼)"""
+        return [
+            DownloadTask(
+                get_download_url(report_type, filename),
+                os.path.join(output_dir, filename),
+                "big5"
+            )
+            for filename in filenames
+        ]
@@ -10,28 +10,73 @@
 架構簡潔，易於維護和擴展
 """
 import os
+import shutil
+import threading
 import time
 import json
-import base64
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Optional, Dict, List
-from datetime import datetime, timedelta
+from typing import NamedTuple, Tuple, Optional
+from datetime import timedelta
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 
-from .selenium_base_downloader import SeleniumBaseDownloader
+from .selenium_base_downloader import SeleniumBaseDownloader, _encode_cookies_blob
 from config.settings import (
     YINGZAIBIAO_URL,
     YINGZAIBIAO_LOGIN_URL,
     YINGZAIBIAO_DOWNLOAD_DIR,
     YINGZAIBIAO_COOKIES_PATH,
     YINGZAIBIAO_RAW_DIR,
+    YINGZAIBIAO_POPUP_WAIT,
+)
+
+
+# 序列化 Cookie 檔案寫入，避免背景寫入與其他路徑同時覆寫
+_COOKIES_WRITE_LOCK = threading.Lock()
+
+# 頁面元素定位器
+LOC_TW_DOWNLOAD_BTN = (By.ID, "ctl00_ContentPlaceHolder1_Linkbutton1")
+LOC_US_EXPORT_BTN = (By.ID, "ctl00_ContentPlaceHolder1_Export")
+LOC_JP_DOWNLOAD_BTN = (By.ID, "ctl00_ContentPlaceHolder1_Linkbutton2")
+LOC_USERNAME = (By.ID, "ctl00_ContentPlaceHolder1_txtUsername")
+LOC_PASSWORD = (By.ID, "ctl00_ContentPlaceHolder1_txtPassword")
+LOC_LOGIN_BTN = (By.ID, "ctl00_ContentPlaceHolder1_btnLogin")
+LOC_RECAPTCHA_IFRAME = (By.CSS_SELECTOR, "iframe[src*='recaptcha']")
+
+# 各市場下載設定: (市場名稱, 下載按鈕定位器, 儲存檔名)
+MARKET_DOWNLOADS: Tuple[Tuple[str, Tuple[str, str], str], ...] = (
+    ("台股", LOC_TW_DOWNLOAD_BTN, "twlist.xlsx"),
+    ("美股", LOC_US_EXPORT_BTN, "uslist.xlsx"),
+    ("日股", LOC_JP_DOWNLOAD_BTN, "jplist.xlsx"),
 )
 
 
+def _validate_cache(mtime_ns: int, retention_days: int) -> Tuple[bool, int]:
+    """
+    判斷快取檔案是否過期 (每次呼叫都以目前時間計算，長時間執行時檔案仍會正確過期)
+
+    Args:
+        mtime_ns: 檔案修改時間 (奈秒)
+        retention_days: 快取保留天數
+
+    Returns:
+        (是否過期, 檔案天數)
+    """
+    age = timedelta(seconds=time.time() - mtime_ns / 1e9)
+    return age > timedelta(days=retention_days), age.days
+
+
 # ============================================================================
 # 輔助類：提供最小實作的 SeleniumBaseDownloader
 # ============================================================================
@@ -39,6 +84,14 @@ from config.settings import (
 class _PlainSelenium(SeleniumBaseDownloader):
     """給策略使用的輕量封裝，實作抽象方法為 no-op"""
 
+    # 持續移除遮擋頁面的全螢幕廣告 iframe
+    init_scripts = (
+        "new MutationObserver(function () {"
+        "  document.querySelectorAll('iframe[style*=\"z-index: 2147483647\"]')"
+        "    .forEach(function (f) { f.remove(); });"
+        "}).observe(document, {childList: true, subtree: true});",
+    )
+
     def __init__(self, logger, download_dir: str):
         super().__init__(logger, download_dir)
 
@@ -59,8 +112,10 @@ class YingZaiBiaoStrategy(ABC):
         self.logger = logger
         self.driver = None
         self.wait = None
+        self.base_downloader = None
         self.download_dir = Path(YINGZAIBIAO_DOWNLOAD_DIR)
         self.download_dir.mkdir(parents=True, exist_ok=True)
+        self._applied_download_path: Optional[str] = None
 
     @abstractmethod
     def download(self) -> Tuple[bool, str]:
@@ -76,22 +131,130 @@ class YingZaiBiaoStrategy(ABC):
         """清理資源"""
         pass
 
-    def _allow_multiple_downloads(self):
-        """透過 CDP 設定允許多檔下載，避免提示阻擋"""
+    def _allow_multiple_downloads(self, download_path: Optional[Path] = None):
+        """
+        透過 CDP 設定允許多檔下載，避免提示阻擋（目錄與上次相同時不重複送出）
+        
+        Args:
+            download_path: 下載目錄（預設為 self.download_dir）
+        """
         if not self.driver:
             return
+        path = str((download_path or self.download_dir).absolute())
+        if path == self._applied_download_path:
+            return
         try:
             self.driver.execute_cdp_cmd(
                 "Page.setDownloadBehavior",
                 {
                     "behavior": "allow",
-                    "downloadPath": str(self.download_dir),
+                    "downloadPath": path,
                 },
             )
+            self._applied_download_path = path
             self.logger.debug("已設定允許多檔案下載")
         except Exception as e:
             self.logger.debug(f"設定多檔下載失敗（可忽略）: {e}")
 
+    def _dismiss_dialog(self):
+        """透過 CDP 關閉開啟中的 JavaScript 對話框（沒有對話框時忽略）"""
+        try:
+            self.driver.execute_cdp_cmd("Page.handleJavaScriptDialog", {"accept": False})
+            self.logger.debug("已關閉 JavaScript 對話框")
+        except Exception:
+            pass
+
+    def _execute_download(self) -> bool:
+        """
+        於各自分頁觸發各市場下載，再並行等待檔案完成
+        
+        下載目錄設定作用於整個瀏覽器，因此每次點擊後需等到檔案開始寫入
+        該市場的子目錄，才切換下一個市場的目錄；之後各檔案同時下載，
+        等待與搬移檔案只操作檔案系統，不需共用 WebDriver
+        """
+        main_handle = self.driver.current_window_handle
+        pending = []
+
+        try:
+            for index, (label, button_locator, filename) in enumerate(MARKET_DOWNLOADS):
+                market_dir = self.download_dir / Path(filename).stem
+                market_dir.mkdir(parents=True, exist_ok=True)
+                try:
+                    # 第一個市場沿用目前已在下載頁的分頁，其餘各開新分頁
+                    if index > 0:
+                        self.driver.switch_to.new_window('tab')
+                        self.driver.get(YINGZAIBIAO_URL)
+                    self._allow_multiple_downloads(market_dir)
+                    # JS click 不要求元素可見或位於視窗內，只需等待元素出現
+                    button = self.wait.until(EC.presence_of_element_located(button_locator))
+                    self.logger.progress(f"下載{label}資料 ({filename})")
+                    self.driver.execute_script("arguments[0].click();", button)
+                    pending.append((label, filename, market_dir))
+                    if not self._wait_for_download_start(market_dir):
+                        self.logger.warning(f"{label}下載尚未開始，後續檔案可能寫入錯誤目錄")
+                except Exception as e:
+                    self.logger.error(f"觸發{label}下載失敗: {e}")
+
+            with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+                results = list(executor.map(lambda args: self._save_download(*args), pending))
+        finally:
+            self._close_extra_tabs(main_handle)
+            self._allow_multiple_downloads()
+            self._cleanup_temp_dir()
+
+        return any(results)
+
+    def _wait_for_download_start(self, market_dir: Path, timeout: float = 30) -> bool:
+        """等待下載目錄出現任何檔案（含 .crdownload），代表 Chrome 已決定儲存位置"""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(
+                lambda _: any(market_dir.iterdir())
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    def _save_download(self, label: str, filename: str, market_dir: Path) -> bool:
+        """等待單一市場下載完成並移動到最終位置"""
+        try:
+            downloaded = self.base_downloader._wait_for_download_complete(
+                timeout=60, download_dir=market_dir
+            )
+            if not downloaded:
+                self.logger.error(f"下載 {filename} 超時")
+                return False
+
+            # 暫存目錄位於 YINGZAIBIAO_RAW_DIR 之下，__init__ 建立暫存目錄時已一併建立
+            final_path = Path(YINGZAIBIAO_RAW_DIR) / filename
+
+            # os.replace 以單一系統呼叫原子性覆蓋既有檔案
+            os.replace(downloaded, final_path)
+            self.logger.success(f"檔案已保存: {final_path}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"下載{label} {filename} 失敗: {e}")
+            return False
+
+    def _close_extra_tabs(self, main_handle: str):
+        """關閉下載用的額外分頁並切回主分頁"""
+        try:
+            for handle in self.driver.window_handles:
+                if handle != main_handle:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            self.driver.switch_to.window(main_handle)
+        except Exception as e:
+            self.logger.debug(f"關閉分頁失敗（可忽略）: {e}")
+
+    def _cleanup_temp_dir(self):
+        """清理臨時目錄（檔案已搬移至最終位置，直接整個目錄移除後重建）"""
+        try:
+            shutil.rmtree(self.download_dir, ignore_errors=True)
+            self.download_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            self.logger.debug(f"清理臨時檔案失敗: {e}")
+
     def __enter__(self):
         return self
 
@@ -118,7 +281,6 @@ class CookieBasedStrategy(YingZaiBiaoStrategy):
         super().__init__(logger)
         self.cookies_env_var = cookies_env_var or "YINGZAIBIAO_COOKIES"
         self.cookies_file = cookies_file or Path(YINGZAIBIAO_COOKIES_PATH)
-        self.base_downloader = None
 
     def download(self) -> Tuple[bool, str]:
         """使用 Cookie 下載"""
@@ -128,12 +290,6 @@ class CookieBasedStrategy(YingZaiBiaoStrategy):
             self.driver = self.base_downloader.driver
             self.wait = self.base_downloader.wait
 
-            # 預先允許多檔案下載，避免 Chrome 再跳出提示
-            self._allow_multiple_downloads()
-
-            # 預先允許多檔案下載，避免 Chrome 再跳出提示
-            self._allow_multiple_downloads()
-
             self.logger.info("使用 Cookie 策略下載")
             
             # 檢查 Cookie 可用性
@@ -141,56 +297,43 @@ class CookieBasedStrategy(YingZaiBiaoStrategy):
             if not cookies_data and not self.cookies_file.exists():
                 return False, "無可用 Cookie（請提供環境變數或本地檔案）"
 
-            # 【策略優化】訪問網站根目錄建立 domain context，避免觸發任何業務邏輯
-            base_url = "https://stocks.ddns.net/"
-            self.logger.debug(f"訪問網站根目錄以建立 Domain Context: {base_url}")
-            try:
-                self.driver.get(base_url)
-                time.sleep(3)
-            except Exception as e:
-                return False, f"無法訪問網站: {e}"
-
-            # 加載 Cookie
+            # 於第一次導覽前以 CDP 寫入 Cookie，只需載入一次目標頁面
             if not self.base_downloader.load_cookies(
                 cookies_data=cookies_data,
-                cookies_path=self.cookies_file
+                cookies_path=self.cookies_file,
+                url=YINGZAIBIAO_URL
             ):
                 return False, "Cookie 加載失敗"
 
             # 驗證關鍵 Cookie 是否成功載入
-            loaded_cookies = {c['name']: c['value'] for c in self.driver.get_cookies()}
-            has_auth = '.ASPXAUTH' in loaded_cookies
+            # 直接查詢載入時記錄的 name -> value 對照，不再向瀏覽器取回 cookies
+            loaded_cookies = self.base_downloader.loaded_cookies
+            auth_value = loaded_cookies.get('.ASPXAUTH')
+            has_auth = auth_value is not None
             has_session = 'ASP.NET_SessionId' in loaded_cookies
             self.logger.debug(f"Cookie 驗證: .ASPXAUTH={'✓' if has_auth else '✗'}, ASP.NET_SessionId={'✓' if has_session else '✗'}")
-            
+
             if not (has_auth and has_session):
                 self.logger.warning("⚠️ 關鍵認證 Cookie 缺失,可能導致登入失敗")
-            
+
             if has_auth:
-                auth_value = loaded_cookies['.ASPXAUTH']
                 self.logger.debug(f".ASPXAUTH 值前20字元: {auth_value[:20]}...")
 
             # 直接訪問目標頁面
             self.logger.debug(f"Cookie 注入完成,前往目標頁面: {YINGZAIBIAO_URL}")
             self.driver.get(YINGZAIBIAO_URL)
-            time.sleep(5)
 
-            # 驗證是否成功進入下載頁面
-            current_url = self.driver.current_url
-            self.logger.debug(f"當前驗證 URL: {current_url}")
-            
-            if current_url and "login.aspx" in current_url.lower():
-                return False, "Cookie 已過期，無法進入下載頁面"
-
-            # 檢查下載按鈕
+            # 等待下載按鈕出現或被導回登入頁，單一等待直接回傳到達的頁面狀態
             try:
-                self.wait.until(
-                    EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_Linkbutton1"))
-                )
-                self.logger.success("Cookie 驗證成功，準備下載")
+                state = WebDriverWait(self.driver, 20, poll_frequency=0.25).until(self._arrival_state)
             except TimeoutException:
                 return False, "找不到下載按鈕，Cookie 可能無效"
 
+            if state == "login":
+                return False, "Cookie 已過期，無法進入下載頁面"
+
+            self.logger.success("Cookie 驗證成功，準備下載")
+
             # 執行下載
             success = self._execute_download()
             if success:
@@ -204,93 +347,12 @@ class CookieBasedStrategy(YingZaiBiaoStrategy):
         finally:
             self._cleanup()
 
-    def _execute_download(self) -> bool:
-        """執行實際下載操作"""
-        tw_success = False
-        us_success = False
-        jp_success = False
-
-        # 下載台股資料
-        try:
-            self.logger.info("下載台股資料 (twlist.xlsx)")
-            tw_success = self._download_file(
-                "ctl00_ContentPlaceHolder1_Linkbutton1",
-                "twlist.xlsx"
-            )
-        except Exception as e:
-            self.logger.error(f"下載台股失敗: {e}")
-
-        # 等待並清理
-        time.sleep(3)
-        self._cleanup_temp_dir()
-
-        # 下載美股資料
-        try:
-            self.logger.info("下載美股資料 (uslist.xlsx)")
-            us_success = self._download_file(
-                "ctl00_ContentPlaceHolder1_Export",
-                "uslist.xlsx"
-            )
-        except Exception as e:
-            self.logger.error(f"下載美股失敗: {e}")
-
-        # 等待並清理
-        time.sleep(3)
-        self._cleanup_temp_dir()
-
-        # 下載日股資料
-        try:
-            self.logger.info("下載日股資料 (jplist.xlsx)")
-            jp_success = self._download_file(
-                "ctl00_ContentPlaceHolder1_Linkbutton2",
-                "jplist.xlsx"
-            )
-        except Exception as e:
-            self.logger.error(f"下載日股失敗: {e}")
-
-        # 最終清理
-        self._cleanup_temp_dir()
-        return tw_success or us_success or jp_success
-
-    def _download_file(self, button_id: str, filename: str) -> bool:
-        """下載單個文件"""
-        try:
-            button = self.wait.until(EC.element_to_be_clickable((By.ID, button_id)))
-            self.logger.progress(f"點擊下載按鈕: {button_id}")
-            
-            self.driver.execute_script("arguments[0].click();", button)
-            time.sleep(2)
-
-            # 等待下載完成
-            downloaded = self.base_downloader._wait_for_download_complete(timeout=60)
-            if not downloaded:
-                self.logger.error(f"下載 {filename} 超時")
-                return False
-
-            # 移動到最終位置
-            final_dir = Path(YINGZAIBIAO_RAW_DIR)
-            final_dir.mkdir(parents=True, exist_ok=True)
-            final_path = final_dir / filename
-
-            if final_path.exists():
-                final_path.unlink()
-            
-            downloaded.rename(final_path)
-            self.logger.success(f"檔案已保存: {final_path}")
-            return True
-
-        except Exception as e:
-            self.logger.error(f"下載 {filename} 失敗: {e}")
-            return False
-
-    def _cleanup_temp_dir(self):
-        """清理臨時目錄"""
-        try:
-            for f in self.download_dir.glob('*'):
-                if f.is_file():
-                    f.unlink()
-        except Exception as e:
-            self.logger.debug(f"清理臨時檔案失敗: {e}")
+    @staticmethod
+    def _arrival_state(driver):
+        """判斷導覽結果：被導回登入頁回傳 "login"，下載按鈕已出現回傳 "ready"，否則繼續等待"""
+        if "login.aspx" in (driver.current_url or "").lower():
+            return "login"
+        return "ready" if driver.find_elements(*LOC_TW_DOWNLOAD_BTN) else False
 
     def _cleanup(self):
         """清理資源"""
@@ -317,7 +379,7 @@ class LocalDevelopmentStrategy(YingZaiBiaoStrategy):
         super().__init__(logger)
         self.username = os.getenv("YINGZAIBIAO_USERNAME", "")
         self.password = os.getenv("YINGZAIBIAO_PASSWORD", "")
-        self.base_downloader = None
+        self._cookie_writer: Optional[threading.Thread] = None
 
     def download(self) -> Tuple[bool, str]:
         """執行本地開發下載"""
@@ -330,27 +392,32 @@ class LocalDevelopmentStrategy(YingZaiBiaoStrategy):
             self.driver = self.base_downloader.driver
             self.wait = self.base_downloader.wait
 
-            # 預先允許多檔案下載
-            self._allow_multiple_downloads()
-
             self.logger.info("使用本地開發策略（支持手動 reCAPTCHA）")
 
             # 登入
             if not self._perform_login():
                 return False, "登入失敗"
 
-            # 提示用戶手動處理
-            self.logger.warning("\n" + "=" * 70)
-            self.logger.warning("⚠️ 如果出現 Chrome 密碼警告彈窗，請手動關閉")
-            self.logger.warning("等待 10 秒...")
-            self.logger.warning("=" * 70 + "\n")
-            time.sleep(10)
+            # 密碼相關提示已由 Chrome prefs 停用；若仍有 JavaScript 對話框則透過 CDP 關閉
+            self._dismiss_dialog()
+            if YINGZAIBIAO_POPUP_WAIT:
+                self.logger.warning("\n" + "=" * 70)
+                self.logger.warning("⚠️ 如果出現 Chrome 密碼警告彈窗，請手動關閉")
+                self.logger.warning(f"等待 {YINGZAIBIAO_POPUP_WAIT} 秒...")
+                self.logger.warning("=" * 70 + "\n")
+                time.sleep(YINGZAIBIAO_POPUP_WAIT)
 
             # 執行下載
             success = self._execute_download()
             if success:
-                # 保存 Cookie 供 GitHub Actions 使用
-                self._save_cookies_for_ci()
+                # 下載成功後才在背景保存 Cookie 供 GitHub Actions 使用，與瀏覽器關閉同時進行
+                # (瀏覽器只在主執行緒存取，背景執行緒僅負責編碼與寫檔，_cleanup 會等待寫入完成)
+                self._cookie_writer = threading.Thread(
+                    target=self._save_cookies_for_ci,
+                    args=(self.driver.get_cookies(),),
+                    daemon=True,
+                )
+                self._cookie_writer.start()
                 return True, "本地開發下載成功"
             else:
                 return False, "下載失敗"
@@ -366,126 +433,96 @@ class LocalDevelopmentStrategy(YingZaiBiaoStrategy):
         try:
             self.logger.progress("前往登入頁面")
             self.driver.get(YINGZAIBIAO_LOGIN_URL)
-            time.sleep(2)
 
-            # 輸入憑證
-            username_input = self.wait.until(
-                EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_txtUsername"))
+            # 輸入憑證：以單次 execute_script 填入帳密並取得登入按鈕，減少 WebDriver 往返
+            self.wait.until(
+                EC.presence_of_element_located(LOC_USERNAME)
             )
-            password_input = self.driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtPassword")
-            login_button = self.driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_btnLogin")
-
             self.logger.debug("輸入憑證")
-            username_input.clear()
-            username_input.send_keys(self.username)
-            time.sleep(0.3)
-
-            password_input.clear()
-            password_input.send_keys(self.password)
-            time.sleep(0.3)
+            login_button = self.driver.execute_script(
+                """
+                var fields = [[arguments[0], arguments[3]], [arguments[1], arguments[4]]];
+                fields.forEach(function (field) {
+                    var input = document.getElementById(field[0]);
+                    input.value = field[1];
+                    input.dispatchEvent(new Event('input', {bubbles: true}));
+                    input.dispatchEvent(new Event('change', {bubbles: true}));
+                });
+                return document.getElementById(arguments[2]);
+                """,
+                LOC_USERNAME[1],
+                LOC_PASSWORD[1],
+                LOC_LOGIN_BTN[1],
+                self.username,
+                self.password,
+            )
 
             # 提示 reCAPTCHA
             self.logger.warning("\n" + "=" * 70)
             self.logger.warning("⚠️ 如果看到 reCAPTCHA 驗證框，請手動完成驗證")
             self.logger.warning("完成後，程式會自動點擊登入按鈕")
             self.logger.warning("=" * 70 + "\n")
-            time.sleep(15)  # 給用戶足夠時間完成 reCAPTCHA
+            # 頁面沒有 reCAPTCHA 或已完成驗證時立即繼續，最多等待 15 秒
+            try:
+                WebDriverWait(self.driver, 15, poll_frequency=0.5).until(self._recaptcha_resolved)
+            except TimeoutException:
+                self.logger.debug("reCAPTCHA 等待逾時，仍嘗試登入")
 
             # 點擊登入
             self.logger.debug("點擊登入按鈕")
             self.driver.execute_script("arguments[0].click();", login_button)
-            time.sleep(10)
-
-            # 驗證登入結果
-            current_url = self.driver.current_url
-            if current_url and "login.aspx" in current_url.lower():
+            # 驗證登入結果：等待期間已持續檢查網址，逾時即代表仍停留在登入頁面，不需再讀取一次
+            try:
+                WebDriverWait(self.driver, 15).until(
+                    lambda d: "login.aspx" not in (d.current_url or "").lower()
+                )
+            except TimeoutException:
                 self.logger.error("登入失敗，仍在登入頁面")
                 self.base_downloader._take_screenshot("login_failed")
                 return False
 
             self.logger.success("登入成功")
             self.driver.get(YINGZAIBIAO_URL)
-            time.sleep(2)
+            self.wait.until(
+                EC.presence_of_element_located(LOC_TW_DOWNLOAD_BTN)
+            )
             return True
 
         except Exception as e:
             self.logger.error(f"登入失敗: {e}")
             return False
 
-    def _execute_download(self) -> bool:
-        """執行下載"""
-        tw_success = False
-        us_success = False
-        jp_success = False
-
-        try:
-            self.logger.info("下載台股資料")
-            tw_success = self._download_file("ctl00_ContentPlaceHolder1_Linkbutton1", "twlist.xlsx")
-        except Exception as e:
-            self.logger.error(f"下載台股失敗: {e}")
-
-        time.sleep(3)
-        self._cleanup_temp_dir()
-
-        try:
-            self.logger.info("下載美股資料")
-            us_success = self._download_file("ctl00_ContentPlaceHolder1_Export", "uslist.xlsx")
-        except Exception as e:
-            self.logger.error(f"下載美股失敗: {e}")
-
-        time.sleep(3)
-        self._cleanup_temp_dir()
-
-        try:
-            self.logger.info("下載日股資料")
-            jp_success = self._download_file("ctl00_ContentPlaceHolder1_Linkbutton2", "jplist.xlsx")
-        except Exception as e:
-            self.logger.error(f"下載日股失敗: {e}")
-
-        self._cleanup_temp_dir()
-        return tw_success or us_success or jp_success
-
-    def _download_file(self, button_id: str, filename: str) -> bool:
-        """下載文件"""
-        try:
-            button = self.wait.until(EC.element_to_be_clickable((By.ID, button_id)))
-            self.logger.progress(f"下載 {filename}")
-            self.driver.execute_script("arguments[0].click();", button)
-            time.sleep(2)
-
-            downloaded = self.base_downloader._wait_for_download_complete(timeout=60)
-            if not downloaded:
-                return False
-
-            final_dir = Path(YINGZAIBIAO_RAW_DIR)
-            final_dir.mkdir(parents=True, exist_ok=True)
-            final_path = final_dir / filename
-
-            if final_path.exists():
-                final_path.unlink()
-
-            downloaded.rename(final_path)
-            self.logger.success(f"保存: {final_path}")
+    @staticmethod
+    def _recaptcha_resolved(driver) -> bool:
+        """頁面無 reCAPTCHA，或 reCAPTCHA 已取得驗證 token"""
+        if not driver.find_elements(*LOC_RECAPTCHA_IFRAME):
             return True
+        return bool(driver.execute_script(
+            "var r = document.getElementById('g-recaptcha-response');"
+            "return r !== null && r.value.length > 0;"
+        ))
 
-        except Exception as e:
-            self.logger.error(f"下載 {filename} 失敗: {e}")
-            return False
+    def _save_cookies_for_ci(self, cookies: list):
+        """
+        保存 Cookie 供 GitHub Actions 使用 (於背景執行緒執行)
 
-    def _save_cookies_for_ci(self):
-        """保存 Cookie 供 GitHub Actions 使用"""
+        Args:
+            cookies: 登入後由瀏覽器取得的 cookies
+        """
         try:
-            cookies = self.driver.get_cookies()
-            
-            # 將 cookies 轉換為 JSON 格式（而非 pickle）
-            cookies_json = json.dumps(cookies)
-            cookies_b64 = base64.b64encode(cookies_json.encode()).decode()
+            # 將 cookies 轉換為 JSON 格式（而非 pickle），只序列化一次，檔案與 Secret 共用同一份位元組
+            if HAS_ORJSON:
+                payload = orjson.dumps(cookies, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(cookies, indent=2).encode("utf-8")
+            # Secret 以 zlib 壓縮後 Base85 編碼，比直接 Base64 小得多
+            cookies_blob = _encode_cookies_blob(payload)
 
             self.logger.success("Cookie 已保存，用於 GitHub Actions")
             self.logger.info("\n" + "=" * 70)
             self.logger.info("📌 為了在 GitHub Actions 中使用 Cookie，請：")
             self.logger.info("1. 複製以下內容：")
-            self.logger.info(cookies_b64[:50] + "...")
+            self.logger.info(cookies_blob[:50] + "...")
             self.logger.info("2. 在 GitHub Repository → Settings → Secrets 中新增：")
             self.logger.info("   名稱: YINGZAIBIAO_COOKIES")
             self.logger.info("   值: <複製的內容>")
@@ -494,24 +531,18 @@ class LocalDevelopmentStrategy(YingZaiBiaoStrategy):
             # 同時儲存到本地
             cookies_path = Path(YINGZAIBIAO_COOKIES_PATH)
             cookies_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(cookies_path, 'w') as f:
-                json.dump(cookies, f, indent=2)
+            with _COOKIES_WRITE_LOCK, open(cookies_path, 'wb') as f:
+                f.write(payload)
             self.logger.debug(f"本地 Cookie 已保存: {cookies_path}")
 
         except Exception as e:
             self.logger.warning(f"保存 Cookie 失敗: {e}")
 
-    def _cleanup_temp_dir(self):
-        """清理臨時目錄"""
-        try:
-            for f in self.download_dir.glob('*'):
-                if f.is_file():
-                    f.unlink()
-        except Exception as e:
-            self.logger.debug(f"清理臨時檔案失敗: {e}")
-
     def _cleanup(self):
-        """清理資源"""
+        """清理資源 (等待背景 Cookie 寫入完成)"""
+        if self._cookie_writer is not None:
+            self._cookie_writer.join()
+            self._cookie_writer = None
         if self.base_downloader:
             self.base_downloader._close_driver()
 
@@ -549,14 +580,16 @@ class CacheLoaderStrategy(YingZaiBiaoStrategy):
             missing_files = []
             expired_files = []
 
+            # 每個檔案只 stat 一次
             for f in excel_files:
-                if not f.exists():
+                try:
+                    st = f.stat()
+                except FileNotFoundError:
                     missing_files.append(f.name)
-                else:
-                    # 檢查文件是否過期
-                    file_age = datetime.now() - datetime.fromtimestamp(f.stat().st_mtime)
-                    if file_age > timedelta(days=self.cache_retention_days):
-                        expired_files.append(f"{f.name} ({file_age.days} 天前)")
+                    continue
+                expired, age_days = _validate_cache(st.st_mtime_ns, self.cache_retention_days)
+                if expired:
+                    expired_files.append(f"{f.name} ({age_days} 天前)")
 
             if missing_files:
                 msg = f"缺少文件: {', '.join(missing_files)}"
@@ -581,11 +614,34 @@ class CacheLoaderStrategy(YingZaiBiaoStrategy):
 # 策略工廠
 # ============================================================================
 
+class EnvSnapshot(NamedTuple):
+    """策略選擇所需的執行環境狀態（每次下載流程只讀取一次）"""
+    is_ci: bool
+    has_cookies_env: bool
+    has_cookies_file: bool
+    has_credentials: bool
+
+    @property
+    def has_cookies(self) -> bool:
+        return self.has_cookies_env or self.has_cookies_file
+
+    @classmethod
+    def capture(cls) -> "EnvSnapshot":
+        """讀取環境變數與本地 Cookie 檔案狀態"""
+        env = os.environ
+        return cls(
+            is_ci=env.get('CI') == 'true' or env.get('GITHUB_ACTIONS') == 'true',
+            has_cookies_env=bool(env.get("YINGZAIBIAO_COOKIES")),
+            has_cookies_file=Path(YINGZAIBIAO_COOKIES_PATH).is_file(),
+            has_credentials=bool(env.get("YINGZAIBIAO_USERNAME")) and bool(env.get("YINGZAIBIAO_PASSWORD")),
+        )
+
+
 class DownloadStrategyFactory:
     """選擇合適的下載策略"""
 
     @staticmethod
-    def create_strategy(logger) -> YingZaiBiaoStrategy:
+    def create_strategy(logger, env: Optional[EnvSnapshot] = None) -> YingZaiBiaoStrategy:
         """
         根據環境自動選擇策略
         
@@ -594,16 +650,18 @@ class DownloadStrategyFactory:
         2. 如果有本地 Cookie，使用 Cookie 策略
         3. 如果有帳密，使用本地開發策略（如果不在 CI）
         4. 否則使用緩存降級策略
+
+        Args:
+            logger: 日誌記錄器
+            env: 環境狀態快照（未提供時即時讀取）
         """
-        is_ci = os.getenv('CI') == 'true' or os.getenv('GITHUB_ACTIONS') == 'true'
-        has_cookies = bool(os.getenv("YINGZAIBIAO_COOKIES")) or Path(YINGZAIBIAO_COOKIES_PATH).exists()
-        has_credentials = bool(os.getenv("YINGZAIBIAO_USERNAME")) and bool(os.getenv("YINGZAIBIAO_PASSWORD"))
+        env = env or EnvSnapshot.capture()
 
-        if has_cookies:
+        if env.has_cookies:
             logger.info("選擇: Cookie 策略")
             return CookieBasedStrategy(logger)
 
-        if has_credentials and not is_ci:
+        if env.has_credentials and not env.is_ci:
             logger.info("選擇: 本地開發策略")
             return LocalDevelopmentStrategy(logger)
 
@@ -634,12 +692,11 @@ class YingZaiBiaoDownloader:
         """
         self.logger.info("🚀 開始盈再表下載流程")
 
-        # 判斷環境與憑證
-        is_ci = os.getenv('CI') == 'true' or os.getenv('GITHUB_ACTIONS') == 'true'
-        has_credentials = bool(os.getenv("YINGZAIBIAO_USERNAME")) and bool(os.getenv("YINGZAIBIAO_PASSWORD"))
+        # 判斷環境與憑證（只讀取一次，與策略工廠共用）
+        env = EnvSnapshot.capture()
 
         # 1st: Cookie 策略（若有 Cookie）
-        strategy = DownloadStrategyFactory.create_strategy(self.logger)
+        strategy = DownloadStrategyFactory.create_strategy(self.logger, env)
         with strategy as s:
             success, message = s.download()
 
@@ -650,7 +707,7 @@ class YingZaiBiaoDownloader:
         self.logger.warning(f"⚠️ 盈再表下載失敗: {message}")
 
         # 2nd: 若 Cookie 失效且有帳密且非 CI，嘗試本地登入
-        if (not is_ci) and has_credentials:
+        if (not env.is_ci) and env.has_credentials:
             self.logger.info("嘗試改用帳密登入策略（本地開發）...")
             try:
                 with LocalDevelopmentStrategy(self.logger) as s2:
@@ -9,55 +9,64 @@ import sys
 import argparse
 import asyncio
 
-# 加入當前路徑以確保模組可以正確匯入
-current_dir = os.path.dirname(os.path.abspath(__file__))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
+__all__ = ["POST_REPORT_TASKS", "main", "override_settings_from_args"]
 
 
 # 可擴充的主流程與後置報表產生任務（統一管理）
+# depends_on 列出需先完成的任務模組 (未啟用的任務視為已完成)，彼此無相依的任務會同時執行
 POST_REPORT_TASKS = [
     {
         "enable_flag": "ENABLE_YINGZAIBIAO_DOWNLOAD",
         "desc": "下載盈再表資料",
         "module": "processors.fetch_yingzaibiao",
-        "entry": "main"
+        "entry": "main",
+        "depends_on": []
     },
     {
         "enable_flag": "UPLOAD_YINGZAIBIAO",
         "desc": "上傳盈再表資料",
         "module": "processors.yingzaibiao_upload",
-        "entry": "main"
+        "entry": "main",
+        "depends_on": ["processors.fetch_yingzaibiao"]
     },
     {
         "enable_flag": None,  # 主流程永遠執行
         "desc": "主資料處理流程",
         "module": "processors.twse_data_processor",  # 直接呼叫 main()
-        "entry": "main"
+        "entry": "main",
+        "depends_on": []
     },
     {
         "enable_flag": "ENABLE_SUMMARY_REPORT",
         "desc": "自動抓取最新股價",
         "module": "processors.fetch_stock_prices",
-        "entry": "main"
+        "entry": "main",
+        "depends_on": []
     },
     {
         "enable_flag": "ENABLE_PRECOMPUTE_METRICS",
         "desc": "整合歷史數據到長表",
         "module": "processors.metrics_precomputer",
-        "entry": "main"
+        "entry": "main",
+        "depends_on": ["processors.twse_data_processor", "processors.fetch_stock_prices"]
     },
     {
         "enable_flag": "ENABLE_SUMMARY_REPORT",
         "desc": "自動產生彙總報表",
         "module": "processors.summary_report_generator",
-        "entry": "main"
+        "entry": "main",
+        "depends_on": [
+            "processors.twse_data_processor",
+            "processors.fetch_stock_prices",
+            "processors.metrics_precomputer",
+        ]
     },
     {
         "enable_flag": "UPLOAD_SUMMARY_REPORT",
         "desc": "上傳自動產生的彙總報表",
         "module": "processors.summary_report_upload",
-        "entry": "main"
+        "entry": "main",
+        "depends_on": ["processors.summary_report_generator"]
     },
     # 未來可在此擴充更多報表產生任務
 ]
@@ -65,10 +74,17 @@ POST_REPORT_TASKS = [
 def str2bool(v):
     return str(v).lower() in ("yes", "true", "t", "1")
 
-def override_settings_from_args(settings):
+def override_settings_from_args(settings, argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # 沒有命令列參數時 (最常見的情況) 不必建立 argparse
+    if not argv:
+        return
+    # 只為命令列實際出現的全大寫設定建立參數
+    passed = {a[2:].split('=', 1)[0] for a in argv if a.startswith('--')}
+    setting_keys = [k for k in vars(settings) if k in passed and k.isupper() and not k.startswith("_")]
+    if not setting_keys:
+        return
     parser = argparse.ArgumentParser()
-    # 只抓全大寫的設定
-    setting_keys = [k for k in dir(settings) if k.isupper() and not k.startswith("_")]
     for k in setting_keys:
         v = getattr(settings, k)
         if isinstance(v, bool):
@@ -77,73 +93,108 @@ def override_settings_from_args(settings):
             parser.add_argument(f"--{k}", type=int)
         elif isinstance(v, float):
             parser.add_argument(f"--{k}", type=float)
-        elif isinstance(v, list):
+        elif isinstance(v, (list, tuple)):
             parser.add_argument(f"--{k}", type=str)
         else:
             parser.add_argument(f"--{k}", type=str)
-    args, _ = parser.parse_known_args()
+    args, _ = parser.parse_known_args(argv)
     for k in setting_keys:
         arg_val = getattr(args, k, None)
         if arg_val is not None:
             v = getattr(settings, k)
             if isinstance(v, bool):
                 setattr(settings, k, str2bool(arg_val))
-            elif isinstance(v, list):
+            elif isinstance(v, (list, tuple)):
                 # 支援逗號分隔或單一字串
                 if isinstance(arg_val, str):
-                    val = [x.strip() for x in arg_val.split(',') if x.strip()]
+                    # intern 以便後續作為字典鍵 (報表類型、市場別等) 查找
+                    val = [sys.intern(x.strip()) for x in arg_val.split(',') if x.strip()]
                 else:
                     val = list(arg_val)
-                setattr(settings, k, val)
+                # 保留原設定的型別 (tuple 設定維持不可變)
+                setattr(settings, k, type(v)(val))
             else:
                 setattr(settings, k, arg_val)
 
-async def main():
+def _resolve_task(task):
     """
-    依任務清單以 async/await 方式依序執行所有主流程與後置報表產生任務。
-    「抓取最新股價」必須 await 完成後，才能 await「彙總表」產生。
+    匯入任務模組並判斷入口型別，結果快取於任務字典 (只解析實際啟用的任務)
+
+    Returns:
+        (型別標記, 入口) - 型別為 async_fn / sync_fn / class_async / class_sync；
+        類別入口回傳實例化後要呼叫的方法名稱 (fetch_and_save 或 __call__)
     """
-    from importlib import import_module
+    if "_kind" not in task:
+        from importlib import import_module
+
+        entry = getattr(import_module(task["module"]), task["entry"])
+        if isinstance(entry, type):
+            # 類別入口：實例化後呼叫 fetch_and_save，沒有時呼叫 __call__
+            if hasattr(entry, "fetch_and_save"):
+                task["_method"] = "fetch_and_save"
+            elif hasattr(entry, "__call__"):
+                task["_method"] = "__call__"
+            else:
+                raise RuntimeError("無法正確執行任務入口")
+            method = getattr(entry, task["_method"])
+            task["_kind"] = "class_async" if asyncio.iscoroutinefunction(method) else "class_sync"
+        elif callable(entry):
+            task["_kind"] = "async_fn" if asyncio.iscoroutinefunction(entry) else "sync_fn"
+        else:
+            raise RuntimeError("無法正確執行任務入口")
+        task["_entry"] = entry
+    return task["_kind"], task["_entry"]
+
+async def _run_task(task):
+    """執行單一任務 (同步入口於執行緒中執行，避免阻塞其他並行任務)"""
+    print(f"\n🚦 {task['desc']}...")
+    try:
+        kind, entry = _resolve_task(task)
+        if kind == "async_fn":
+            await entry()
+        elif kind == "sync_fn":
+            await asyncio.to_thread(entry)
+        else:
+            method = getattr(entry(), task["_method"])
+            if kind == "class_async":
+                await method()
+            else:
+                await asyncio.to_thread(method)
+    except Exception as e:
+        print(f"⚠️ {task['desc']}失敗: {e}")
 
+async def main():
+    """
+    依任務清單的相依關係以 async/await 方式執行所有主流程與後置報表產生任務。
+    相依任務完成 (成功或失敗) 後才會啟動後續任務，例如「抓取最新股價」完成後才產生「彙總表」；
+    彼此無相依的任務 (如主資料處理流程與抓取最新股價) 同時執行。
+    """
     from config import settings
     override_settings_from_args(settings)
 
-    for i, task in enumerate(POST_REPORT_TASKS):
-        if task["enable_flag"] is None:
-            enabled = True
-        else:
-            enabled = getattr(settings, task["enable_flag"], False)
-        if enabled:
-            print(f"\n🚦 {task['desc']}...")
-            try:
-                mod = import_module(task["module"])
-                entry = getattr(mod, task["entry"])
-                # 若為 async function，await；否則同步呼叫
-                if callable(entry):
-                    if asyncio.iscoroutinefunction(entry):
-                        await entry()
-                    else:
-                        entry()
-                else:
-                    instance = entry()
-                    # 若有 async fetch_and_save，await；否則同步呼叫
-                    if hasattr(instance, "fetch_and_save"):
-                        method = getattr(instance, "fetch_and_save")
-                        if asyncio.iscoroutinefunction(method):
-                            await method()
-                        else:
-                            method()
-                    elif hasattr(instance, "__call__"):
-                        call_method = getattr(instance, "__call__")
-                        if asyncio.iscoroutinefunction(call_method):
-                            await call_method()
-                        else:
-                            call_method()
-                    else:
-                        raise RuntimeError("無法正確執行任務入口")
-            except Exception as e:
-                print(f"⚠️ {task['desc']}失敗: {e}")
+    pending = [
+        task for task in POST_REPORT_TASKS
+        if task["enable_flag"] is None or getattr(settings, task["enable_flag"], False)
+    ]
+    enabled_modules = {task["module"] for task in pending}
+    done = set()
+    running = {}
+
+    while pending or running:
+        for task in list(pending):
+            deps = [d for d in task.get("depends_on", ()) if d in enabled_modules]
+            if all(d in done for d in deps):
+                pending.remove(task)
+                running[asyncio.create_task(_run_task(task))] = task["module"]
+
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for fut in finished:
+            done.add(running.pop(fut))
 
 
 if __name__ == "__main__":
+    # 加入當前路徑以確保模組可以正確匯入
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    if current_dir not in sys.path:
+        sys.path.insert(0, current_dir)
     asyncio.run(main())
\ No newline at end of file
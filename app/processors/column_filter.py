@@ -2,11 +2,38 @@
 TWSE 資料下載工具 - 欄位過濾器
 """
 import pandas as pd
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from utils.logger import Logger
+from utils.pandas_setup import configure_pandas
 from config.column_configs import get_columns_to_keep
 
 
+@lru_cache(maxsize=None)
+def _columns_to_keep(report_type: str) -> Optional[Tuple[str, ...]]:
+    """取得報表類型要保留的欄位 (設定在執行期間不變，只查詢一次)；未設定時回傳 None"""
+    try:
+        return tuple(get_columns_to_keep(report_type))
+    except KeyError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _intersect_columns(
+    columns: Tuple[str, ...], columns_to_keep: Tuple[str, ...]
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    計算資料框中存在與缺少的保留欄位 (依設定順序，相同欄位組合只計算一次)
+    
+    Returns:
+        (存在的欄位, 缺少的欄位) - 結果會被快取共用，以 tuple 回傳避免被修改
+    """
+    present = set(columns)
+    existing = tuple(col for col in columns_to_keep if col in present)
+    missing = tuple(col for col in columns_to_keep if col not in present)
+    return existing, missing
+
+
 class ColumnFilter:
     """欄位過濾器 - 統一處理欄位過濾需求"""
     
@@ -17,6 +44,7 @@ class ColumnFilter:
         Args:
             logger: 日誌記錄器
         """
+        configure_pandas()
         self.logger = logger
     
     def filter_columns(self, df: pd.DataFrame, report_type: str) -> pd.DataFrame:
@@ -33,22 +61,21 @@ class ColumnFilter:
         if df.empty:
             return df
         
-        try:
-            columns_to_keep = get_columns_to_keep(report_type)
-        except KeyError:
+        columns_to_keep = _columns_to_keep(report_type)
+        if columns_to_keep is None:
             self.logger.info(f"📋 {report_type} 未設定欄位過濾，保留所有 {len(df.columns)} 欄")
             return df
         
-        existing_columns = [col for col in columns_to_keep if col in df.columns]
+        existing_columns, missing_columns = _intersect_columns(tuple(df.columns), columns_to_keep)
         
         if existing_columns:
-            missing_columns = set(columns_to_keep) - set(existing_columns)
             if missing_columns:
                 self.logger.warning(f"{report_type} 找不到欄位: {list(missing_columns)}")
             
             self.logger.info(f"📋 {report_type} 欄位過濾: {len(df.columns)} → {len(existing_columns)} 欄")
-            self.logger.debug(f"   保留欄位: {existing_columns}")
-            return df[existing_columns].copy()
+            self.logger.debug(f"   保留欄位: {list(existing_columns)}")
+            # Copy-on-Write 下欄位選取不會複製資料，修改時才會複製
+            return df.loc[:, list(existing_columns)]
         else:
             self.logger.warning(f"{report_type} 找不到任何指定的欄位，保留所有 {len(df.columns)} 欄")
             return df
@@ -1,11 +1,15 @@
 """
 TWSE 資料下載工具 - CSV 清理器
 """
+import mmap
 import pandas as pd
 import os
-from typing import Optional, List
+from typing import Callable, Optional, List
 from utils.logger import Logger
 
+# 表頭通常位於檔案前幾行，最多只掃描此行數
+HEADER_SCAN_MAX_LINES = 200
+
 
 class CSVCleaner:
     """CSV 清理器 - 統一處理各種 CSV 清理需求"""
@@ -31,13 +35,14 @@ class CSVCleaner:
         Returns:
             清理後的資料框
         """
-        self.logger.debug(f"清理股利檔案: {os.path.basename(file_path)}")
+        name = os.path.basename(file_path)
+        self.logger.debug(f"清理股利檔案: {name}")
         
         # 1. 找到真正的表頭位置
         header_idx = self._find_dividend_header(file_path)
         
         if header_idx is None:
-            self.logger.warning(f"無法在 {os.path.basename(file_path)} 找到公司代號欄位")
+            self.logger.warning(f"無法在 {name} 找到公司代號欄位")
             return pd.DataFrame()
         
         # 2. 載入資料
@@ -55,7 +60,7 @@ class CSVCleaner:
         # 5. 最終排序
         df = self._final_sort_dividend(df)
         
-        self.logger.success(f"{os.path.basename(file_path)} 清理完成，保留 {len(df)} 行")
+        self.logger.success(f"{name} 清理完成，保留 {len(df)} 行")
         
         return df
     
@@ -69,13 +74,14 @@ class CSVCleaner:
         Returns:
             清理後的資料框
         """
-        self.logger.debug(f"清理 ETF 股利檔案: {os.path.basename(file_path)}")
+        name = os.path.basename(file_path)
+        self.logger.debug(f"清理 ETF 股利檔案: {name}")
         
         # 1. 找到真正的表頭位置
         header_idx = self._find_etf_header(file_path)
         
         if header_idx is None:
-            self.logger.warning(f"無法在 {os.path.basename(file_path)} 找到有效的表頭")
+            self.logger.warning(f"無法在 {name} 找到有效的表頭")
             # 嘗試直接讀取
             try:
                 df = pd.read_csv(file_path, encoding="utf-8-sig", dtype=str)
@@ -93,7 +99,7 @@ class CSVCleaner:
         
         df = self._basic_cleanup(df)
         
-        self.logger.success(f"{os.path.basename(file_path)} 清理完成，保留 {len(df)} 行")
+        self.logger.success(f"{name} 清理完成，保留 {len(df)} 行")
         
         return df
     
@@ -107,50 +113,58 @@ class CSVCleaner:
         Returns:
             清理後的資料框
         """
+        name = os.path.basename(file_path)
+        
         # 嘗試多種編碼格式
         encodings = ["utf-8-sig", "utf-8", "big5", "cp950", "gbk"]
         
         for encoding in encodings:
             try:
-                df = pd.read_csv(file_path, encoding=encoding, dtype=str,
-                               on_bad_lines="skip", engine="python")
+                df = self._read_csv(file_path, encoding=encoding)
                 if not df.empty:
-                    self.logger.debug(f"{os.path.basename(file_path)} 使用 {encoding} 編碼成功讀取")
+                    self.logger.debug(f"{name} 使用 {encoding} 編碼成功讀取")
                     return self._basic_cleanup(df)
             except Exception:
                 continue
         
-        self.logger.error(f"讀取 {os.path.basename(file_path)} 失敗: 嘗試所有編碼格式均失敗")
+        self.logger.error(f"讀取 {name} 失敗: 嘗試所有編碼格式均失敗")
         return pd.DataFrame()
     
     def _find_dividend_header(self, file_path: str) -> Optional[int]:
         """找到股利報表的表頭位置"""
-        try:
-            with open(file_path, "r", encoding="utf-8-sig", errors="ignore") as f:
-                lines = f.readlines()
-            
-            for i, line in enumerate(lines):
-                # 尋找包含 "公司代號名稱" 或同時包含 "公司代號" 和 "公司名稱" 的表頭行
-                if ("公司代號名稱" in line) or (("公司代號" in line) and ("公司名稱" in line)):
-                    if line.count(",") > 2:  # 確保是表格開頭
-                        return i
-            
-            return None
-        except Exception:
-            return None
+        # 尋找包含 "公司代號名稱" 或同時包含 "公司代號" 和 "公司名稱" 的表頭行
+        return self._scan_header(
+            file_path,
+            lambda line: ("公司代號名稱" in line) or (("公司代號" in line) and ("公司名稱" in line))
+        )
     
     def _find_etf_header(self, file_path: str) -> Optional[int]:
         """找到 ETF 股利報表的表頭位置"""
-        try:
-            with open(file_path, "r", encoding="utf-8-sig", errors="ignore") as f:
-                lines = f.readlines()
+        # 尋找包含 ETF 相關欄位的表頭行
+        keywords = ('代號', '證券代號', 'ETF', '名稱', '證券簡稱', '除息交易日')
+        return self._scan_header(file_path, lambda line: any(keyword in line for keyword in keywords))
+    
+    @staticmethod
+    def _scan_header(file_path: str, is_header: Callable[[str], bool], max_lines: int = HEADER_SCAN_MAX_LINES) -> Optional[int]:
+        """
+        以 mmap 逐行掃描檔案開頭，找到第一個符合條件的表頭行即停止
+        
+        Args:
+            file_path: CSV 檔案路徑
+            is_header: 判斷是否為表頭行的條件
+            max_lines: 最多掃描的行數
             
-            for i, line in enumerate(lines):
-                # 尋找包含 ETF 相關欄位的表頭行
-                if any(keyword in line for keyword in ['代號', '證券代號', 'ETF', '名稱', '證券簡稱', '除息交易日']):
-                    if line.count(',') > 2:  # 確保是表格開頭
+        Returns:
+            表頭所在的行號，找不到時回傳 None
+        """
+        try:
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for i, raw_line in enumerate(iter(mm.readline, b"")):
+                    if i >= max_lines:
+                        break
+                    line = raw_line.decode("utf-8-sig", "ignore")
+                    if is_header(line) and line.count(",") > 2:  # 確保是表格開頭
                         return i
-            
             return None
         except Exception:
             return None
@@ -158,18 +172,30 @@ class CSVCleaner:
     def _load_csv_with_header(self, file_path: str, header_idx: int) -> pd.DataFrame:
         """載入指定表頭位置的 CSV"""
         try:
-            return pd.read_csv(
-                file_path, 
-                encoding="utf-8-sig", 
-                dtype=str, 
-                engine="python",
-                on_bad_lines="skip", 
-                skiprows=header_idx
-            )
+            return self._read_csv(file_path, encoding="utf-8-sig", skiprows=header_idx)
         except Exception as e:
             self.logger.error(f"無法讀取 {os.path.basename(file_path)}: {e}")
             return pd.DataFrame()
     
+    def _read_csv(self, file_path: str, encoding: str, skiprows: int = 0) -> pd.DataFrame:
+        """
+        以 C 引擎讀取 CSV（全部欄位為字串、略過格式錯誤的行），解析失敗時才改用 python 引擎
+        
+        Args:
+            file_path: CSV 檔案路徑
+            encoding: 編碼格式
+            skiprows: 表頭前要略過的行數
+            
+        Returns:
+            讀取的資料框
+        """
+        options = dict(encoding=encoding, dtype=str, on_bad_lines="skip", skiprows=skiprows)
+        try:
+            return pd.read_csv(file_path, engine="c", low_memory=False, **options)
+        except pd.errors.ParserError:
+            self.logger.debug(f"{os.path.basename(file_path)} C 引擎解析失敗，改用 python 引擎")
+            return pd.read_csv(file_path, engine="python", **options)
+    
     def _basic_cleanup(self, df: pd.DataFrame) -> pd.DataFrame:
         """基本清理：移除空列、Unnamed 欄位"""
         if df.empty:
@@ -179,7 +205,7 @@ class CSVCleaner:
         df = df.dropna(how="all")
         
         # 移除 Unnamed 欄位
-        df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
+        df = df.loc[:, ~df.columns.str.startswith("Unnamed")]
         
         return df
     
@@ -194,10 +220,7 @@ class CSVCleaner:
             self.logger.warning(f"第一欄不是公司代號欄位: {first_col}")
             return df
         
-        # 按第一欄排序（將有問題的列排到一起）
-        df = df.sort_values(by=first_col, ascending=True, ignore_index=True, na_position='last')
-        
-        # 移除有問題的列
+        # 移除有問題的列（排序於 _final_sort_dividend 統一處理）
         mask_to_keep = self._create_dividend_filter_mask(df, first_col)
         df_cleaned = df[mask_to_keep].copy()
         df_cleaned.reset_index(drop=True, inplace=True)
@@ -205,33 +228,20 @@ class CSVCleaner:
         return df_cleaned
     
     def _create_dividend_filter_mask(self, df: pd.DataFrame, first_col: str) -> pd.Series:
-        """建立股利資料過濾遮罩"""
-        mask = pd.Series([True] * len(df))
+        """建立股利資料過濾遮罩（以向量化字串運算一次計算整欄）"""
+        values = df[first_col].astype(str).str.strip()
         
-        for i, val in enumerate(df[first_col]):
-            val_str = str(val).strip()
-            
-            # 跳過空值
-            if val_str in ['nan', '', 'None']:
-                mask[i] = False
-                continue
-            
-            # 移除重複的表頭行
-            if "公司代號" in val_str and " - " not in val_str:
-                mask[i] = False
-                continue
-            
-            # 移除不包含 " - " 的行（正常的公司代號應該是 "1234 - 公司名稱" 格式）
-            if " - " not in val_str:
-                mask[i] = False
-                continue
-            
-            # 移除太短的行（可能是斷行造成的）
-            if len(val_str) < 5:
-                mask[i] = False
-                continue
+        # 跳過空值
+        not_empty = ~values.isin(['nan', '', 'None'])
+        
+        # 移除不包含 " - " 的行（正常的公司代號應該是 "1234 - 公司名稱" 格式），
+        # 重複的表頭行 (含 "公司代號" 但無 " - ") 也一併排除
+        has_separator = values.str.contains(" - ", regex=False)
+        
+        # 移除太短的行（可能是斷行造成的）
+        long_enough = values.str.len() >= 5
         
-        return mask
+        return not_empty & has_separator & long_enough
     
     def _final_sort_dividend(self, df: pd.DataFrame) -> pd.DataFrame:
         """股利資料最終排序（委託給 DataSorter）"""
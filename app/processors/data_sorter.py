@@ -1,10 +1,15 @@
 """
 TWSE 資料下載工具 - 資料排序器
 """
+import re
+import numpy as np
 import pandas as pd
 from typing import Optional
 from utils.logger import Logger
 
+# 代號中的數字部分 (如 "1234 - 公司名稱" 的 1234)
+_CODE_RE = re.compile(r'(\d+)')
+
 
 class DataSorter:
     """資料排序器 - 統一處理各種排序需求"""
@@ -77,27 +82,14 @@ class DataSorter:
         Returns:
             排序後的資料框
         """
-        df_sorted = df.copy()
-        
-        # 提取數字部分作為排序鍵
-        df_sorted['_sort_key'] = (
-            df_sorted[code_column]
-            .astype(str)
-            .str.extract(r'(\d+)')[0]
-        )
-        df_sorted['_sort_key'] = pd.to_numeric(df_sorted['_sort_key'], errors='coerce')
-        
-        # 按數字排序
-        df_sorted = df_sorted.sort_values(
-            by='_sort_key', 
-            ascending=True, 
-            ignore_index=True
-        )
+        # 提取數字部分作為排序鍵（只建立排序鍵陣列，不複製整個資料框）
+        codes = df[code_column].astype(str).str.extract(_CODE_RE, expand=False)
+        keys = pd.to_numeric(codes, errors='coerce').to_numpy(dtype=float)
         
-        # 移除臨時排序鍵
-        df_sorted = df_sorted.drop(columns=['_sort_key'])
+        # 按數字穩定排序，無法解析的代號排在最後
+        order = np.argsort(np.where(np.isnan(keys), np.inf, keys), kind='stable')
         
-        return df_sorted
+        return df.iloc[order].reset_index(drop=True)
     
     def sort_by_columns(
         self, 
@@ -8,27 +8,29 @@ TWSE 股價資料抓取工具
 import os
 import sys
 import json
+import asyncio
 from typing import Dict, Any
 
-# 修正 sys.path，確保可從 processors 目錄直接執行時正確匯入 app 下模組
-current_dir = os.path.dirname(os.path.abspath(__file__))
-app_dir = os.path.abspath(os.path.join(current_dir, ".."))
-if app_dir not in sys.path:
-    sys.path.insert(0, app_dir)
+__all__ = ["StockPriceFetcher", "main"]
 
-try:
-    # 匯入設定
-    from config.settings import MERGED_CSV_DIR, MERGED_JSON_DIR, LOG_DIR_BASE, ensure_directories
 
-    # 匯入功能模組
-    from utils.logger import Logger
-    from downloaders.stock_price_downloader import StockPriceDownloader
-    from processors.stock_price_processor import StockPriceProcessor
+def _lazy_imports() -> None:
+    """延後匯入設定與功能模組，僅在建立 StockPriceFetcher 時載入 (匯入本模組不會連帶載入下載器)"""
+    global MERGED_CSV_DIR, MERGED_JSON_DIR, LOG_DIR_BASE, ensure_directories
+    global Logger, StockPriceDownloader, StockPriceProcessor
+    try:
+        # 匯入設定
+        from config.settings import MERGED_CSV_DIR, MERGED_JSON_DIR, LOG_DIR_BASE, ensure_directories
+
+        # 匯入功能模組
+        from utils.logger import Logger
+        from downloaders.stock_price_downloader import StockPriceDownloader
+        from processors.stock_price_processor import StockPriceProcessor
 
-except ImportError as e:
-    print(f"❌ 匯入模組失敗: {e}")
-    print("請確認所有必要的模組檔案都存在且路徑正確")
-    sys.exit(1)
+    except ImportError as e:
+        print(f"❌ 匯入模組失敗: {e}")
+        print("請確認所有必要的模組檔案都存在且路徑正確")
+        sys.exit(1)
 
 
 class StockPriceFetcher:
@@ -36,6 +38,8 @@ class StockPriceFetcher:
     
     def __init__(self):
         """初始化股價抓取器"""
+        _lazy_imports()
+        
         # 確保目錄存在
         ensure_directories()
         
@@ -51,6 +55,13 @@ class StockPriceFetcher:
         self.json_output_path = os.path.join(MERGED_JSON_DIR, "latest_stock_prices.json")
         self.csv_output_path = os.path.join(MERGED_CSV_DIR, "latest_stock_prices.csv")
     
+    async def __aenter__(self) -> "StockPriceFetcher":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """結束時關閉下載器持有的 keep-alive 連線"""
+        self.downloader.close()
+    
     async def fetch_and_save(self) -> bool:
         """
         抓取股價資料並儲存 (async/await)
@@ -98,13 +109,16 @@ class StockPriceFetcher:
             else:
                 output_df = processed_df
             
-            # 4. 儲存檔案
-            json_success = self._save_json(output_df)
-            csv_success = self._save_csv(output_df)
+            # 4. 儲存檔案 (摘要統計只計算一次；JSON 與 CSV 互不相依，於執行緒中同時寫入)
+            stats = self.processor.get_summary_stats(output_df)
+            json_success, csv_success = await asyncio.gather(
+                asyncio.to_thread(self._save_json, output_df, stats),
+                asyncio.to_thread(self._save_csv, output_df)
+            )
             
             if json_success and csv_success:
                 # 5. 記錄處理結果
-                self._log_result(output_df)
+                self._log_result(stats)
                 self.logger.success("🎉 股價資料抓取完成！")
                 return True
             else:
@@ -115,20 +129,16 @@ class StockPriceFetcher:
             self.logger.error(f"股價抓取過程發生錯誤: {e}")
             return False
     
-    def _save_json(self, df) -> bool:
-        """儲存 JSON 檔案"""
+    def _save_json(self, df, stats: Dict[str, Any]) -> bool:
+        """儲存 JSON 檔案 (資料列由 pandas 的 C 實作直接序列化，不經 to_dict 建立中介字典)"""
         try:
-            # 轉換為字典格式
-            data = df.to_dict('records')
-            
-            # 加入元資料
-            output_data = {
-                'metadata': self.processor.get_summary_stats(df),
-                'data': data
-            }
-            
             with open(self.json_output_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
+                # 加入元資料
+                f.write('{"metadata": ')
+                json.dump(stats, f, ensure_ascii=False, indent=2)
+                f.write(', "data": ')
+                df.to_json(f, orient='records', force_ascii=False)
+                f.write('}')
             
             self.logger.success(f"JSON 已儲存: {self.json_output_path}")
             return True
@@ -148,10 +158,8 @@ class StockPriceFetcher:
             self.logger.error(f"儲存 CSV 失敗: {e}")
             return False
     
-    def _log_result(self, df) -> None:
+    def _log_result(self, stats: Dict[str, Any]) -> None:
         """記錄處理結果"""
-        stats = self.processor.get_summary_stats(df)
-        
         log_entry = {
             'type': 'stock_prices',
             'timestamp': stats.get('updated_at'),
@@ -185,8 +193,8 @@ async def main() -> None:
         print("🏢 TWSE 股價資料抓取工具")
         print("=" * 40)
         
-        fetcher = StockPriceFetcher()
-        success = await fetcher.fetch_and_save()
+        async with StockPriceFetcher() as fetcher:
+            success = await fetcher.fetch_and_save()
         
         if success:
             print("\n✅ 股價資料抓取成功！")
@@ -204,5 +212,8 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    import asyncio
+    # 修正 sys.path，確保可從 processors 目錄直接執行時正確匯入 app 下模組
+    app_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
     asyncio.run(main())
\ No newline at end of file
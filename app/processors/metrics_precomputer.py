@@ -18,6 +18,7 @@ from config.settings import (
     SUMMARY_PRICE_FILE,
 )
 from utils.logger import Logger
+from utils.merged_table import read_merged_csv
 
 
 class MetricsPrecomputer:
@@ -31,9 +32,9 @@ class MetricsPrecomputer:
         self.update_log_file = METRICS_UPDATE_LOG_FILE
 
     def _read_csv_safe(self, path: str) -> pd.DataFrame:
-        """安全讀取 CSV，處理 BOM 和編碼問題"""
+        """安全讀取 CSV (有同名 Parquet 時優先讀取)，處理 BOM 和編碼問題"""
         try:
-            df = pd.read_csv(path, dtype=str, encoding="utf-8-sig").replace({"": np.nan})
+            df = read_merged_csv(path)
             df.rename(columns=lambda x: x.strip(), inplace=True)
             # 修正欄位名稱 BOM 問題
             if df.columns[0].startswith("\ufeff"):
@@ -5,10 +5,12 @@ import os
 import pandas as pd
 from typing import List
 from utils.logger import Logger
+from utils.pandas_setup import configure_pandas
 from processors.csv_cleaner import CSVCleaner
 from processors.data_standardizer import DataStandardizer
 from processors.column_filter import ColumnFilter
 from processors.data_sorter import DataSorter
+from config.column_configs import get_low_cardinality_columns
 
 
 class ReportProcessor:
@@ -21,6 +23,7 @@ class ReportProcessor:
         Args:
             logger: 日誌記錄器
         """
+        configure_pandas()
         self.logger = logger
         self.csv_cleaner = CSVCleaner(logger)
         self.data_standardizer = DataStandardizer(logger)
@@ -129,4 +132,21 @@ class ReportProcessor:
         else:
             combined_df = self.data_sorter.sort_by_company_code(combined_df, report_name)
         
-        return combined_df
\ No newline at end of file
+        # 5. 低基數欄位轉為 category（減少記憶體，Parquet 以字典編碼儲存）
+        return self._categorize(combined_df, report_name)
+    
+    def _categorize(self, df: pd.DataFrame, report_type: str) -> pd.DataFrame:
+        """
+        將設定的低基數欄位轉為 category 型別
+        
+        Args:
+            df: 資料框
+            report_type: 報表類型
+            
+        Returns:
+            轉換後的資料框
+        """
+        columns = [col for col in get_low_cardinality_columns(report_type) if col in df.columns]
+        if not columns:
+            return df
+        return df.astype({col: "category" for col in columns})
\ No newline at end of file
@@ -11,6 +11,7 @@ from processors.data_standardizer import DataStandardizer
 from processors.data_sorter import DataSorter
 from processors.report_processor import ReportProcessor
 from utils.logger import Logger
+from utils.merged_table import read_merged_csv
 from config.settings import (
     SUMMARY_FROM_DIR,
     SUMMARY_PRICE_FILE,
@@ -220,7 +221,7 @@ class DataLoader:
 
     def _read_csv_with_nan(self, path: str) -> pd.DataFrame:
         try:
-            df = pd.read_csv(path, dtype=str, encoding="utf-8-sig").replace({"": np.nan})
+            df = read_merged_csv(path)
             df.rename(columns=lambda x: x.strip(), inplace=True)
             # 修正欄位名稱 BOM 問題
             if df.columns[0].startswith("\ufeff"):
@@ -1,8 +1,15 @@
+import asyncio
 import os
 import sys
-import shutil
+import threading
 
-from typing import List
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 app_dir = os.path.abspath(os.path.join(current_dir, ".."))
@@ -10,44 +17,95 @@ if app_dir not in sys.path:
     sys.path.insert(0, app_dir)
 
 from utils.logger import Logger
-from processors.report_processor import ReportProcessor
-from downloaders.twse_downloader import TWSEDownloader
-from downloaders.etf_downloader import ETFDownloader
+from utils.merged_table import HAS_PYARROW, parquet_path_for
 # from config.settings import MERGED_LOG_DIR, DOWNLOAD_REPORTS, ensure_directories
 from config.settings import (
         START_YEAR, END_YEAR, ENABLE_DOWNLOAD_REPORTS, ENABLE_MERGE_REPORTS, DOWNLOAD_REPORTS, SAVE_FORMAT,
-        RAW_DATA_DIR, MERGED_CSV_DIR, MERGED_JSON_DIR, MERGED_LOG_DIR, ensure_directories
+        RAW_DATA_DIR, MERGED_CSV_DIR, MERGED_JSON_DIR, MERGED_PARQUET_DIR, MERGED_LOG_DIR, PRETTY_JSON,
+        YEAR_CONCURRENCY, ensure_directories
     )
 
+def _json_default(obj):
+    """orjson 無法直接序列化的型別 (如 pd.Timestamp) 轉為精度到秒的 ISO 8601 字串，與 to_json 備援輸出一致"""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat(timespec="seconds")
+    raise TypeError(f"無法序列化的型別: {type(obj).__name__}")
+
 class TWSEDataProcessor:
     """TWSE 資料處理主控制器 - 簡潔版"""
     
     def __init__(self):
         """初始化處理器"""
         self.logger = Logger(MERGED_LOG_DIR)
-        self.report_processor = ReportProcessor(self.logger)
-        self.twse_downloader = TWSEDownloader(self.logger)
-        self.etf_downloader = ETFDownloader(self.logger)
+        
+        # 報表處理器與下載器於首次使用時才匯入並建立（僅合併模式不需要下載器）
+        self._report_processor = None
+        self._twse_downloader = None
+        self._etf_downloader = None
+        self._init_lock = threading.Lock()
         
         ensure_directories()
         
+        # 處理日誌為讀取後整份覆寫，各年度並行寫入時需序列化
+        self._log_lock = threading.Lock()
+        
         # 支援的報表類型
         self.supported_reports = [
             "balance_sheet", "income_statement", "cash_flow", 
             "dividend", "etf_dividend"
         ]
     
-    def process_all_reports(self) -> None:
+    @property
+    def report_processor(self):
+        """報表處理器（延遲匯入）"""
+        if self._report_processor is None:
+            with self._init_lock:
+                if self._report_processor is None:
+                    from processors.report_processor import ReportProcessor
+                    self._report_processor = ReportProcessor(self.logger)
+        return self._report_processor
+    
+    @property
+    def twse_downloader(self):
+        """TWSE 下載器（延遲匯入）"""
+        if self._twse_downloader is None:
+            with self._init_lock:
+                if self._twse_downloader is None:
+                    from downloaders.twse_downloader import TWSEDownloader
+                    self._twse_downloader = TWSEDownloader(self.logger)
+        return self._twse_downloader
+    
+    @property
+    def etf_downloader(self):
+        """ETF 下載器（延遲匯入）"""
+        if self._etf_downloader is None:
+            with self._init_lock:
+                if self._etf_downloader is None:
+                    from downloaders.etf_downloader import ETFDownloader
+                    self._etf_downloader = ETFDownloader(self.logger)
+        return self._etf_downloader
+    
+    async def process_all_reports(self) -> None:
         """處理所有報表"""
         self.logger.info("🚀 開始處理 TWSE 資料...")
         
         reports_to_process = self._get_reports_to_process()
         
-        for report_name in reports_to_process:
-            self._process_single_report(report_name)
+        try:
+            for report_name in reports_to_process:
+                await self._process_single_report(report_name)
+        finally:
+            self.close()
         
         self.logger.success("🎉 所有處理完成！")
     
+    def close(self) -> None:
+        """關閉已建立的下載器 (釋放執行緒池與 HTTP 連線)"""
+        for downloader in (self._twse_downloader, self._etf_downloader):
+            if downloader is not None:
+                downloader.close()
+        self._twse_downloader = self._etf_downloader = None
+    
     def _get_reports_to_process(self) -> List[str]:
         """取得要處理的報表清單"""
         if DOWNLOAD_REPORTS and 'all' not in DOWNLOAD_REPORTS:
@@ -55,26 +113,64 @@ class TWSEDataProcessor:
         else:
             return self.supported_reports.copy()
     
-    def _process_single_report(self, report_name: str) -> None:
-        """處理單一報表類型"""
-        self.logger.info(f"\n=== 開始處理 {report_name} ===")
+    async def process_all_years(self, report_name: str):
+        """
+        處理單一報表的所有年度，並合併為一個資料框
         
-        for year in range(START_YEAR, END_YEAR + 1):
-            year_str = str(year)
-            year_dir = os.path.join(RAW_DATA_DIR, report_name, year_str)
-            
-            # 1. 確保資料可用（下載或檢查現有資料）
-            if not self._ensure_data_available(report_name, year_str, year_dir):
-                continue
-            
-            # 2. 處理資料（使用專門的處理器）
-            processed_df = self.report_processor.process_year_data(report_name, year_str, year_dir)
+        Args:
+            report_name: 報表名稱
             
-            if processed_df.empty:
-                continue
-            
-            # 3. 儲存結果
-            self._save_processed_data(processed_df, report_name, year_str)
+        Returns:
+            依年度順序合併的資料框（無資料時為空資料框）
+        """
+        import pandas as pd
+        
+        frames = {}
+        await self._process_single_report(report_name, frames)
+        if not frames:
+            return pd.DataFrame()
+        # 一次合併所有年度，避免逐年累加造成的重複複製
+        return pd.concat([frames[year] for year in sorted(frames, key=int)], ignore_index=True)
+    
+    async def _process_single_report(self, report_name: str, frames: Optional[Dict[str, object]] = None) -> None:
+        """
+        處理單一報表類型（各年度互不相依，於執行緒中並行處理，最多 YEAR_CONCURRENCY 個）
+        
+        Args:
+            report_name: 報表名稱
+            frames: 若提供，依年度收集已儲存的資料框；未提供時各年度儲存後即釋放
+        """
+        self.logger.info(f"\n=== 開始處理 {report_name} ===")
+        
+        semaphore = asyncio.Semaphore(YEAR_CONCURRENCY)
+        
+        async def _year(year_str: str) -> None:
+            async with semaphore:
+                df = await asyncio.to_thread(self._process_year, report_name, year_str)
+            if frames is not None and df is not None:
+                frames[year_str] = df
+        
+        async with asyncio.TaskGroup() as tg:
+            for year in range(START_YEAR, END_YEAR + 1):
+                tg.create_task(_year(str(year)))
+    
+    def _process_year(self, report_name: str, year_str: str):
+        """處理單一報表的單一年度，回傳處理後的資料框（無資料時回傳 None）"""
+        year_dir = os.path.join(RAW_DATA_DIR, report_name, year_str)
+        
+        # 1. 確保資料可用（下載或檢查現有資料）
+        if not self._ensure_data_available(report_name, year_str, year_dir):
+            return None
+        
+        # 2. 處理資料（使用專門的處理器）
+        processed_df = self.report_processor.process_year_data(report_name, year_str, year_dir)
+        
+        if processed_df.empty:
+            return None
+        
+        # 3. 儲存結果
+        self._save_processed_data(processed_df, report_name, year_str)
+        return processed_df
     
     def _ensure_data_available(self, report_name: str, year_str: str, year_dir: str) -> bool:
         """確保資料可用（下載或檢查現有資料）"""
@@ -90,10 +186,7 @@ class TWSEDataProcessor:
             return self._download_data(report_name, year_str, year_dir)
     
     def _download_data(self, report_name: str, year_str: str, year_dir: str) -> bool:
-        """下載資料"""
-        # 清理舊資料
-        if os.path.exists(year_dir):
-            shutil.rmtree(year_dir)
+        """下載資料 (保留既有檔案，供條件式請求判斷是否需要重新下載)"""
         os.makedirs(year_dir, exist_ok=True)
         
         try:
@@ -118,17 +211,45 @@ class TWSEDataProcessor:
         # 儲存 JSON
         if "json" in SAVE_FORMAT:
             json_path = os.path.join(MERGED_JSON_DIR, f"{year_str}-{report_name}.json")
-            df.to_json(json_path, orient="records", force_ascii=False, indent=2)
+            self._write_json(df, json_path)
             self.logger.success(f"JSON 已儲存: {json_path}")
         
+        # 儲存 Parquet（欄式二進位格式，供後續步驟快速讀取）
+        if "parquet" in SAVE_FORMAT:
+            if HAS_PYARROW:
+                os.makedirs(MERGED_PARQUET_DIR, exist_ok=True)
+                parquet_path = parquet_path_for(f"{year_str}-{report_name}.csv")
+                df.to_parquet(parquet_path, engine="pyarrow", compression="snappy", index=False)
+                self.logger.success(f"Parquet 已儲存: {parquet_path}")
+            else:
+                self.logger.warning("未安裝 pyarrow，略過 Parquet 輸出")
+        
         # 寫入日誌
-        self.logger.write_processing_log(year_str, report_name, csv_path, json_path, len(df))
+        with self._log_lock:
+            self.logger.write_processing_log(year_str, report_name, csv_path, json_path, len(df))
+
+    @staticmethod
+    def _write_json(df, json_path: str) -> None:
+        """以 orjson 輸出 records 格式 JSON (未安裝時退回 pandas)，僅在 PRETTY_JSON 開啟時縮排"""
+        if HAS_ORJSON:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if PRETTY_JSON:
+                option |= orjson.OPT_INDENT_2
+            # pd.NA / NaT / NaN 轉為 None，與 to_json 相同輸出 null (orjson 無法序列化 pd.NA)
+            records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+            with open(json_path, "wb") as f:
+                f.write(orjson.dumps(records, default=_json_default, option=option))
+        else:
+            df.to_json(
+                json_path, orient="records", force_ascii=False, date_format="iso", date_unit="s",
+                indent=2 if PRETTY_JSON else None
+            )
 
-def main() -> None:
-    """主程式入口"""
+async def main() -> None:
+    """主程式入口 (async/await)"""
     try:
         processor = TWSEDataProcessor()
-        processor.process_all_reports()
+        await processor.process_all_reports()
     except KeyboardInterrupt:
         print("\n⚠️ 使用者中斷程式執行")
     except Exception as e:
@@ -136,4 +257,4 @@ def main() -> None:
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+測試共用設定：將 app 目錄加入匯入路徑
+"""
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
@@ -0,0 +1,32 @@
+"""
+合併資料表讀取工具測試
+"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from utils import merged_table
+
+
+def test_parquet_and_csv_paths_return_same_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(merged_table, "MERGED_PARQUET_DIR", str(tmp_path / "parquet"))
+    (tmp_path / "parquet").mkdir()
+
+    df = pd.DataFrame({
+        "代號": ["1101", "2330", "NA", "null", "0050"],
+        "名稱": ["台泥", "", "None", "N/A", "元大台灣50"],
+        "年度": pd.array([113, 113, pd.NA, 112, 112], dtype="Int64"),
+        "季別": pd.Categorical(["Q1", "Q2", None, "Q4", "Q4"]),
+        "淨利": [1.5, None, 0.1 + 0.2, -3.0, 1e-7],
+    })
+    csv_path = tmp_path / "113-income_statement.csv"
+    df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    df.to_parquet(merged_table.parquet_path_for(str(csv_path)), engine="pyarrow", index=False)
+
+    from_parquet = merged_table.read_merged_csv(str(csv_path))
+    monkeypatch.setattr(merged_table, "HAS_PYARROW", False)
+    from_csv = merged_table.read_merged_csv(str(csv_path))
+
+    pd.testing.assert_frame_equal(from_parquet, from_csv)
+    assert from_csv["代號"].isna().tolist() == [False, False, True, True, False]
@@ -0,0 +1,46 @@
+"""
+TWSEDataProcessor JSON 輸出測試
+"""
+import json
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from processors import twse_data_processor
+from processors.twse_data_processor import TWSEDataProcessor
+
+EXPECTED_RECORDS = [
+    {"代號": "1101", "年度": 113, "淨利": None, "季別": "Q4", "除息交易日": "2024-07-15T00:00:00"},
+    {"代號": "2330", "年度": None, "淨利": 1.5, "季別": None, "除息交易日": None},
+]
+
+
+def _sample_frame():
+    return pd.DataFrame({
+        "代號": ["1101", "2330"],
+        "年度": pd.array([113, pd.NA], dtype="Int64"),
+        "淨利": [pd.NA, 1.5],
+        "季別": pd.Categorical(["Q4", None]),
+        "除息交易日": pd.to_datetime(["2024-07-15", None]),
+    })
+
+
+def _write_and_load(tmp_path, monkeypatch, use_orjson):
+    monkeypatch.setattr(twse_data_processor, "HAS_ORJSON", use_orjson)
+    json_path = tmp_path / f"out-{use_orjson}.json"
+    TWSEDataProcessor._write_json(_sample_frame(), str(json_path))
+    with open(json_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_write_json_fallback_serializes_missing_values_as_null(tmp_path, monkeypatch):
+    assert _write_and_load(tmp_path, monkeypatch, use_orjson=False) == EXPECTED_RECORDS
+
+
+def test_write_json_orjson_matches_fallback(tmp_path, monkeypatch):
+    if not twse_data_processor.HAS_ORJSON:
+        pytest.skip("未安裝 orjson")
+    from_orjson = _write_and_load(tmp_path, monkeypatch, use_orjson=True)
+    from_pandas = _write_and_load(tmp_path, monkeypatch, use_orjson=False)
+    assert from_orjson == from_pandas == EXPECTED_RECORDS
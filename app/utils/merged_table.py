@@ -0,0 +1,60 @@
+"""
+TWSE 資料下載工具 - 合併資料表讀取工具
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from config.settings import MERGED_PARQUET_DIR
+
+# 與 pd.read_csv 預設 na_values 相同的缺值字串，讓 Parquet 與 CSV 兩種讀取方式結果一致
+READ_CSV_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def parquet_path_for(csv_path: str) -> str:
+    """取得與 CSV 同名的 Parquet 檔案路徑 (位於 MERGED_PARQUET_DIR)"""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(MERGED_PARQUET_DIR, f"{name}.parquet")
+
+
+def read_merged_csv(csv_path: str) -> pd.DataFrame:
+    """
+    讀取合併資料表，同名 Parquet 存在且不比 CSV 舊時優先讀取 Parquet
+
+    回傳格式與 pd.read_csv(dtype=str) 一致：所有值皆為字串，空值與 READ_CSV_NA_VALUES 中的字串為 NaN
+
+    Args:
+        csv_path: CSV 檔案路徑
+
+    Returns:
+        資料框
+    """
+    parquet_path = parquet_path_for(csv_path)
+    if HAS_PYARROW and _is_fresh(parquet_path, csv_path):
+        df = pd.read_parquet(parquet_path, engine="pyarrow")
+        df = df.astype(str).where(df.notna(), np.nan)
+    else:
+        df = pd.read_csv(csv_path, dtype=str, encoding="utf-8-sig")
+    return df.mask(df.isin(READ_CSV_NA_VALUES))
+
+
+def _is_fresh(parquet_path: str, csv_path: str) -> bool:
+    """Parquet 檔案存在且修改時間不早於 CSV (CSV 不存在時只需 Parquet 存在)"""
+    try:
+        parquet_mtime = os.stat(parquet_path).st_mtime_ns
+    except OSError:
+        return False
+    try:
+        return parquet_mtime >= os.stat(csv_path).st_mtime_ns
+    except OSError:
+        return True
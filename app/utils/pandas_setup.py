@@ -0,0 +1,21 @@
+"""
+TWSE 資料下載工具 - pandas 執行設定
+"""
+import pandas as pd
+
+_CONFIGURED: bool = False  # 本次執行是否已套用設定
+
+
+def configure_pandas() -> None:
+    """
+    套用資料處理流程所需的 pandas 設定 (每次執行只套用一次)
+
+    啟用 Copy-on-Write：子集合與欄位選取共用資料，僅在修改時才複製。
+    pandas 3.0 起為固定行為，該選項已棄用，不再設定。
+    """
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+    if int(pd.__version__.split(".", 1)[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+    _CONFIGURED = True